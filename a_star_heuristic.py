@@ -2,31 +2,109 @@ import solver_helpers as sh
 import rule_helpers as rh
 import neural_network as nn
 import torch as tr
+from collections import OrderedDict
 
 # A baseline heuristic for A* Search
 def simple_heuristic(state: tuple) -> int:
-    (args, claim, hist) = sh.unpack(state)
+    claim = state.claim if isinstance(state, sh.ClauseLog) else state[1]
     parsed_claim = rh.parse_expression(claim)
     a = parsed_claim[1]
     b = parsed_claim[2]
     advanced_conclusion = False
     if b != "": advanced_conclusion = True
 
+    # (a bitset lookup when state is a ClauseLog)
     steps = 0
-    if a not in args: steps += 1
+    if not sh.contains(state, a): steps += 1
     if advanced_conclusion:
-        if b not in args: steps += 1
+        if not sh.contains(state, b): steps += 1
 
     return steps
 
 # Encapsulate this in a class so that net is only
 # loaded once
 class NeuralNetwork:
-    def __init__(self):
-        self.net = tr.load("saved_net.pt")
+    def __init__(self, path="saved_net.pt"):
+        self.net = tr.load(path, weights_only=False)
 
     # An advnaced heuristic using trained neural network
-    def nn_heuristic(self, state: tuple) -> int:
-        # Get heuristic value
-        steps = self.net(tr.stack(tuple(map(nn.one_hot_encoding, [state]))))
-        return steps
+    def nn_heuristic(self, state: tuple) -> float:
+        return self.nn_batch_heuristic([state])[0]
+
+    # Batched version of nn_heuristic; evaluates every state in a single
+    # forward pass
+    def nn_batch_heuristic(self, states: list) -> list:
+        with tr.no_grad():
+            steps = self.net(nn.batch_encoding(states))
+        return steps.reshape(-1).tolist()
+
+
+# Memoizes a heuristic on an order-independent state key (the set of
+# clauses and the claim, or the given key function), evicting the least
+# recently used value once maxsize values are stored. A single cache can be
+# shared by every search over the same arguments, e.g. all problems in a
+# batch.
+class HeuristicCache:
+    def __init__(self, heuristic, batch_heuristic=None, maxsize=100000, key=None):
+        self.heuristic = heuristic
+        self.batch_heuristic = batch_heuristic
+        self.maxsize = maxsize
+        self.key = cache_key if key is None else key
+        self.table = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, state: tuple):
+        key = self.key(state)
+        if key in self.table:
+            self.hits += 1
+            self.table.move_to_end(key)
+            return self.table[key]
+        self.misses += 1
+        value = self.heuristic(state)
+        self.store(key, value)
+        return value
+
+    # Batched lookup; misses are evaluated with one batch_heuristic call
+    # (or one heuristic call each if no batched version was given)
+    def batch(self, states: list) -> list:
+        keys = [self.key(state) for state in states]
+        values = [None] * len(states)
+        missing = []
+        for i in range(len(states)):
+            if keys[i] in self.table:
+                self.hits += 1
+                self.table.move_to_end(keys[i])
+                values[i] = self.table[keys[i]]
+            else:
+                missing.append(i)
+        self.misses += len(missing)
+        if len(missing) > 0:
+            if self.batch_heuristic is not None:
+                computed = self.batch_heuristic([states[i] for i in missing])
+            else:
+                computed = [self.heuristic(states[i]) for i in missing]
+            for j in range(len(missing)):
+                values[missing[j]] = computed[j]
+                self.store(keys[missing[j]], computed[j])
+        return values
+
+    def store(self, key, value):
+        self.table[key] = value
+        while len(self.table) > self.maxsize:
+            self.table.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.table),
+                "hit_rate": self.hits / lookups if lookups > 0 else 0.0}
+
+    def clear(self):
+        self.table.clear()
+        self.hits = 0
+        self.misses = 0
+
+# Key used by HeuristicCache (a ClauseLog is its own key, so lookups do not
+# copy its clauses)
+def cache_key(state: tuple) -> tuple:
+    return sh.state_key(state)
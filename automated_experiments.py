@@ -3,8 +3,14 @@ import rule_helpers as rh
 import queue_search as qs
 import a_star_heuristic as astar
 import baseline_ai as baseline
+import problem_corpus as pc
+import lemma_store as ls
 import matplotlib.pyplot as plt
 import numpy as np
+import random
+import os
+import torch as tr
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # This is an automated testing file that generates random claims to prove for
 # each of the three AI types: baseline (random), BFS, and A* Search.
@@ -24,21 +30,48 @@ import numpy as np
 
 LIMITED_BATCHES = False
 
+# Experiments are run in parallel on WORKERS processes. Each experiment in a
+# batch is seeded with SEED + (its index in the batch), so results do not
+# depend on the number of workers. Set SEED to None for a random seed.
+WORKERS = os.cpu_count()
+SEED = None
+
+# To replay a fixed set of problems (see problem_corpus.py) instead of
+# generating new claims, set CORPUS to the path of a saved corpus.
+CORPUS = None
+
+# Set LEMMAS to True to have the BFS and A* Simple searches of a batch share a
+# lemma store (see lemma_store.py), so each problem starts from the clauses
+# derived for earlier problems. Node counts then depend on the order problems
+# are solved in (and, with WORKERS > 1, on which worker solves them).
+LEMMAS = False
+
 class AutomatedExperiments:
 
-    def run_experiment(args: list, claim_depth: int, baseline_depth: int, adv_heuristic) -> tuple:
+    def run_experiment(args: list, claim_depth: int, baseline_depth: int, adv_heuristic, adv_batch_heuristic=None,
+                       simple_heuristic=astar.simple_heuristic, claim=None, lemmas=None) -> tuple:
 
         # Generate the claim to prove by a series of random actions applied to args
-        generation_state = sh.initial_state(args, "claim")
-        (generation_state, x, y) = baseline.apply_random_actions(generation_state, count=claim_depth)
-        claim = sh.unpack(generation_state)[0][-1]
+        if claim is None: claim = pc.generate_claim(args, claim_depth, random)
 
         state = sh.initial_state(args, claim)
 
         problem = qs.SearchProblem(state, sh.proof_complete)
-        plan_bfs, node_count_bfs = qs.breadth_first_search(problem)
-        plan_astar, node_count_astar = qs.a_star_search(problem, astar.simple_heuristic)
-        plan_astar_nn, node_count_astar_nn = qs.a_star_search(problem, adv_heuristic)
+        if lemmas is None:
+            plan_bfs, node_count_bfs = qs.breadth_first_search(problem)
+            plan_astar, node_count_astar = qs.a_star_search(problem, simple_heuristic)
+            plan_astar_nn, node_count_astar_nn = qs.a_star_search(problem, adv_heuristic, adv_batch_heuristic)
+        else:
+            # Lemmas are only recorded once every search has run, so each
+            # starts from the lemmas of earlier problems. The neural network
+            # search gets none, as the net cannot encode more than 15 args.
+            result_bfs = lemmas.search(args, claim, qs.breadth_first_search)
+            result_astar = lemmas.search(args, claim, lambda p: qs.a_star_search(p, simple_heuristic))
+            plan_astar_nn, node_count_astar_nn = qs.a_star_search(problem, adv_heuristic, adv_batch_heuristic)
+            for result in (result_bfs, result_astar):
+                if result.status == qs.PROVED: lemmas.record(args, result.plan)
+            (plan_bfs, node_count_bfs) = result_bfs
+            (plan_astar, node_count_astar) = result_astar
 
         # -- Run AI --
 
@@ -63,7 +96,11 @@ class AutomatedExperiments:
 
         return (states_bfs, node_count_bfs), (states_astar, node_count_astar), (state_baseline, steps, solved), (states_astar_nn, node_count_astar_nn)
 
-def run_batch(args: list, formatted_title: str, claim_depth: int, baseline_depth = 100, batch_size = 100) -> tuple:
+# If corpus (a list of (args, claim, depth) records) is given, the batch
+# replays its problems rather than generating claims from args.
+# net_path is the saved net used by the neural network heuristic.
+def run_batch(args: list, formatted_title: str, claim_depth: int, baseline_depth = 100, batch_size = 100,
+              seed = None, workers = 1, corpus = None, net_path = "saved_net.pt") -> tuple:
     # BFS Analysis
     node_count_bfs = 0
     node_dist_bfs = []
@@ -80,10 +117,21 @@ def run_batch(args: list, formatted_title: str, claim_depth: int, baseline_depth
     baseline_failures = 0
     step_dist_baseline = []
 
-    Net = astar.NeuralNetwork()
-    adv = Net.nn_heuristic
-    for i in range(batch_size):
-        bfs, a_star, base, a_star_nn = AutomatedExperiments.run_experiment(args, claim_depth, baseline_depth, adv)
+    if corpus is not None:
+        corpus = corpus[:batch_size]
+        batch_size = len(corpus)
+    else: corpus = [(args, None, None)] * batch_size
+    if seed is None: seed = random.randrange(2**32)
+    if workers > 1:
+        results = [None] * batch_size
+        for (i, result) in run_parallel_experiments(corpus, claim_depth, baseline_depth, seed, workers, net_path):
+            results[i] = result
+    else:
+        heuristics = load_heuristics(net_path)
+        results = [run_seeded_experiment(corpus[i], claim_depth, baseline_depth, seed + i, heuristics)
+                   for i in range(batch_size)]
+
+    for (bfs, a_star, base, a_star_nn) in results:
         # Node Counts
         node_count_bfs += bfs[1]
         node_count_astar += a_star[1]
@@ -118,6 +166,51 @@ def run_batch(args: list, formatted_title: str, claim_depth: int, baseline_depth
     return (node_dist_bfs, node_dist_astar, step_dist_search, step_dist_baseline, node_dist_astar_nn)
 
 
+# Load the net and heuristic caches used by run_seeded_experiment(). Heuristic
+# values are cached across the batch (every problem starts from the same
+# args). The neural network cache keys on the ordered args since the net's
+# encoding depends on clause order. The lemma store is None unless LEMMAS.
+def load_heuristics(net_path: str = "saved_net.pt") -> tuple:
+    Net = astar.NeuralNetwork(net_path)
+    adv = astar.HeuristicCache(Net.nn_heuristic, Net.nn_batch_heuristic, key=ordered_key)
+    simple = astar.HeuristicCache(astar.simple_heuristic)
+    lemmas = ls.LemmaStore() if LEMMAS else None
+    return (adv, simple, lemmas)
+
+def ordered_key(state: tuple) -> tuple:
+    (args, claim, hist) = sh.unpack(state)
+    return (tuple(args), claim)
+
+# Run a single experiment on a corpus record with the random module seeded by
+# seed (a claim is generated if the record's claim is None)
+def run_seeded_experiment(record: tuple, claim_depth: int, baseline_depth: int, seed: int, heuristics: tuple) -> tuple:
+    (args, claim, depth) = record
+    (adv, simple, lemmas) = heuristics
+    random.seed(seed)
+    return AutomatedExperiments.run_experiment(args, claim_depth, baseline_depth, adv, adv.batch, simple, claim, lemmas)
+
+# Heuristics loaded once in each worker process
+_worker_heuristics = None
+
+def init_worker(net_path: str = "saved_net.pt"):
+    global _worker_heuristics
+    tr.set_num_threads(1)
+    _worker_heuristics = load_heuristics(net_path)
+
+def run_worker_experiment(i: int, record: tuple, claim_depth: int, baseline_depth: int, seed: int) -> tuple:
+    return (i, run_seeded_experiment(record, claim_depth, baseline_depth, seed, _worker_heuristics))
+
+# Run the experiments for a list of corpus records on a process pool,
+# yielding (index in batch, result) pairs as they finish
+def run_parallel_experiments(corpus: list, claim_depth: int, baseline_depth: int, seed: int, workers: int,
+                             net_path: str = "saved_net.pt"):
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(net_path,)) as pool:
+        futures = [pool.submit(run_worker_experiment, i, corpus[i], claim_depth, baseline_depth, seed + i)
+                   for i in range(len(corpus))]
+        for future in as_completed(futures):
+            yield future.result()
+
+
 def create_experiment_histogram(data: tuple, label: str) -> None:
     # BFS Nodes
     bfs_dist = np.asarray(data[0])
@@ -174,36 +267,38 @@ def print_padding(size: int) -> str:
 
 if __name__ == "__main__":
 
+    corpus = pc.load_corpus(CORPUS) if CORPUS is not None else {}
+
     print("\n             BFS (nodes, steps)  |  A* Simple (nodes, steps)  |  A* Neural Net (nodes, steps)  |  Baseline AI (steps, failures) \n")
     print("----------------------------------------------------------------------------------------------------------------------------------- \n")
 
     # -- Smallest Experiment --
     smallest_args = ["p -> q", "q -> r", "p", "q"]
     str_smallest = "Smallest:       "           
-    smallest_dist = run_batch(smallest_args, str_smallest, 10)
+    smallest_dist = run_batch(smallest_args, str_smallest, 10, seed=SEED, workers=WORKERS, corpus=corpus.get("Smallest"))
 
     # -- Small Experiment --
     small_args = ["p -> q", "q -> r", "s & ~q", "~r"]
     str_small = "Small:          "
-    small_dist = run_batch(smallest_args, str_small, 50)
+    small_dist = run_batch(smallest_args, str_small, 50, seed=SEED, workers=WORKERS, corpus=corpus.get("Small"))
 
     # -- Medium Experiment --
     medium_args = ["p -> q", "~s & (q -> r)", "p", "t -> s"]
     str_medium = "Medium:         "
-    if LIMITED_BATCHES: medium_dist = run_batch(medium_args, str_medium, 100, baseline_depth=200, batch_size=50)
-    else: medium_dist = run_batch(medium_args, str_medium, 100, baseline_depth=200)
+    if LIMITED_BATCHES: medium_dist = run_batch(medium_args, str_medium, 100, baseline_depth=200, batch_size=50, seed=SEED, workers=WORKERS, corpus=corpus.get("Medium"))
+    else: medium_dist = run_batch(medium_args, str_medium, 100, baseline_depth=200, seed=SEED, workers=WORKERS, corpus=corpus.get("Medium"))
 
     # -- Large Experiment --
     large_args = ["p -> q", "r -> (p & q)", "r | s", "~s"]
     str_large = "Large:          "
-    if LIMITED_BATCHES: large_dist = run_batch(large_args, str_large, 100, baseline_depth=200, batch_size=20)
-    else: large_dist = run_batch(large_args, str_large, 100, baseline_depth=200)
+    if LIMITED_BATCHES: large_dist = run_batch(large_args, str_large, 100, baseline_depth=200, batch_size=20, seed=SEED, workers=WORKERS, corpus=corpus.get("Large"))
+    else: large_dist = run_batch(large_args, str_large, 100, baseline_depth=200, seed=SEED, workers=WORKERS, corpus=corpus.get("Large"))
 
     # -- Largest Experiment --
     largest_args = ["p -> (q -> s)", "s -> ~r", "p & q", "r | s"]
     str_largest = "Largest:        "
-    if LIMITED_BATCHES: largest_dist = run_batch(largest_args, str_largest, 200, baseline_depth=300, batch_size=5)
-    else: largest_dist = run_batch(largest_args, str_largest, 200, baseline_depth=300)
+    if LIMITED_BATCHES: largest_dist = run_batch(largest_args, str_largest, 200, baseline_depth=300, batch_size=5, seed=SEED, workers=WORKERS, corpus=corpus.get("Largest"))
+    else: largest_dist = run_batch(largest_args, str_largest, 200, baseline_depth=300, seed=SEED, workers=WORKERS, corpus=corpus.get("Largest"))
 
     # -- Histogram Generator --
     create_experiment_histogram(smallest_dist, "Smallest")
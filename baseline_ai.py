@@ -7,11 +7,14 @@ import rule_helpers as rh
 #   - Final state
 #   - If proof is complete
 #   - Number of steps taken
-def apply_random_actions(state, count = 100):
+#
+# Actions are drawn from rng (the random module unless a seeded
+# random.Random is given).
+def apply_random_actions(state, count = 100, rng = random):
     steps = 0
     for a in range(count):
         applic_rules = sh.valid_actions(state)
-        to_apply = random.choice(applic_rules)
+        to_apply = rng.choice(applic_rules)
         state = sh.apply_rule(to_apply, state)
         steps += 1
         if sh.proof_complete(state):
@@ -0,0 +1,122 @@
+import os
+import sys
+import json
+import argparse
+from multiprocessing import Pool
+import torch as tr
+import queue_search as qs
+import run_solver as rs
+import proof_cache as pcache
+
+# This file solves proofs non-interactively, reading one problem per line of
+# JSON from a file (or stdin) and writing one result per line of JSON:
+#
+#   python batch_solver.py problems.jsonl --method astar --workers 8 > results.jsonl
+#
+# Each problem is {"assumptions": [...], "claim": "..."} with an optional
+# "id" (the line number by default) and "method" overriding --method. Each
+# result holds the id, status, plan (the derived proof lines), node_count and
+# time, or an error. Problems are solved across --workers processes and
+# results are written as soon as they finish, so they are not in input order.
+#
+# With --dominance, the A* methods skip states whose clauses are a proper
+# subset of an explored state's (fewer nodes, possibly longer proofs).
+#
+# With --cache PATH, every worker shares the proof cache (see proof_cache.py)
+# at PATH, so problems solved before (in this or an earlier run) are not
+# searched again.
+
+WORKERS = os.cpu_count()
+
+# Method names accepted besides the run_solver.SOLVE_METHODS numbers
+METHOD_NAMES = {"baseline": '2', "bfs": '3', "astar": '4', "astar-nn": '5', "saturation": '6'}
+
+def method_number(method: str) -> str:
+    method = METHOD_NAMES.get(method, method)
+    if method not in rs.SOLVE_METHODS: raise ValueError("Invalid solving method: %s" % method)
+    return method
+
+# The proof cache of this process (None if not caching)
+cache = None
+
+def init_worker(cache_path: str = None):
+    global cache
+    tr.set_num_threads(1)
+    if cache_path is not None: cache = pcache.ProofCache(cache_path)
+
+# Solve the problem on one input line. job is (line number, line, default
+# method, max_seconds, max_nodes, dominance).
+def solve_line(job: tuple) -> dict:
+    (number, line, method, max_seconds, max_nodes, dominance) = job
+    try:
+        problem = json.loads(line)
+        problem_id = problem.get("id", number)
+        method = method_number(str(problem.get("method", method)))
+        args = [str(arg) for arg in problem["assumptions"]]
+        claim = str(problem["claim"])
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        return {"id": number, "error": "Invalid problem: %s" % e}
+    try:
+        result = rs.solve_claim(args, claim, method, qs.SearchBudget(max_nodes=max_nodes, max_seconds=max_seconds), cache,
+                                dominance=dominance)
+    except Exception as e:
+        return {"id": problem_id, "error": "%s: %s" % (type(e).__name__, e)}
+    plan = [list(line) for line in result["proof"] if line[2] != "Assumption"]
+    return {"id": problem_id, "status": result["status"], "plan": plan,
+            "node_count": result["node_count"], "time": result["time"], "cached": result["cached"]}
+
+# Yield a job for each non-blank line of lines
+def read_jobs(lines, method: str, max_seconds: float, max_nodes: int, dominance: bool = False):
+    for number, line in enumerate(lines, 1):
+        if len(line.strip()) > 0: yield (number, line, method, max_seconds, max_nodes, dominance)
+
+# Solve every problem in lines, writing results to output as they finish.
+# Returns the number of problems solved.
+def run_batch(lines, output, method: str = '4', workers: int = WORKERS, max_seconds: float = None,
+              max_nodes: int = None, chunksize: int = 1, cache_path: str = None, dominance: bool = False) -> int:
+    global cache
+    jobs = read_jobs(lines, method_number(method), max_seconds, max_nodes, dominance)
+    count = 0
+    if workers == 1:
+        if cache_path is not None: cache = pcache.ProofCache(cache_path)
+        results = map(solve_line, jobs)
+    else:
+        pool = Pool(workers, initializer=init_worker, initargs=(cache_path,))
+        results = pool.imap_unordered(solve_line, jobs, chunksize)
+    try:
+        for result in results:
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+            count += 1
+    finally:
+        if workers != 1:
+            pool.terminate()
+            pool.join()
+        elif cache is not None:
+            cache.close()
+            cache = None
+    return count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve proofs from a JSONL file, one result per line.")
+    parser.add_argument("input", nargs="?", default="-", help="JSONL problems file ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL results file ('-' for stdout)")
+    parser.add_argument("-m", "--method", default="astar",
+                        help="baseline, bfs, astar, astar-nn or saturation (or 2 to 6 as in run_solver.py)")
+    parser.add_argument("-w", "--workers", type=int, default=WORKERS)
+    parser.add_argument("--timeout", type=float, default=None, help="seconds allowed per problem")
+    parser.add_argument("--max-nodes", type=int, default=None, help="nodes allowed per problem")
+    parser.add_argument("--chunksize", type=int, default=1)
+    parser.add_argument("--cache", default=None, help="proof cache file to reuse results from")
+    parser.add_argument("--dominance", action="store_true",
+                        help="skip A* states dominated by an explored state (may lengthen proofs)")
+    options = parser.parse_args()
+
+    lines = sys.stdin if options.input == "-" else open(options.input)
+    output = sys.stdout if options.output == "-" else open(options.output, "w")
+    try:
+        run_batch(lines, output, options.method, options.workers, options.timeout, options.max_nodes, options.chunksize,
+                  options.cache, options.dominance)
+    finally:
+        if lines is not sys.stdin: lines.close()
+        if output is not sys.stdout: output.close()
@@ -0,0 +1,162 @@
+import os
+import sys
+import json
+import time
+import tracemalloc
+import solver_helpers as sh
+import rule_helpers as rh
+import queue_search as qs
+import a_star_heuristic as astar
+import neural_network as nn
+import problem_corpus as pc
+
+# This file measures the speed of the hot paths of the solver on a fixed
+# workload so that performance changes can be compared between commits:
+#
+#   python benchmark_solver.py [results.json] [previous_results.json]
+#
+# Results are saved as JSON to the first file (RESULTS_FILE by default). If a
+# second file is given, each benchmark is compared against it.
+#
+# The workload is the corpus saved in WORKLOAD_FILE (see problem_corpus.py),
+# so every commit is measured on the same problems even if claim generation
+# changes. If the file is missing, a seeded corpus over the five arg sets from
+# automated_experiments.py at each of CLAIM_DEPTHS is generated and saved.
+
+RESULTS_FILE = "benchmark_results.json"
+WORKLOAD_FILE = "benchmark_corpus.json.gz"
+SEED = 667
+CLAIM_DEPTHS = [5, 20, 50]
+PROBLEMS_PER_BATCH = 10
+# Each benchmark is repeated until it has run for at least this many seconds
+MIN_TIME = 0.5
+
+ARG_SETS = [("Smallest", ["p -> q", "q -> r", "p", "q"]),
+            ("Small", ["p -> q", "q -> r", "s & ~q", "~r"]),
+            ("Medium", ["p -> q", "~s & (q -> r)", "p", "t -> s"]),
+            ("Large", ["p -> q", "r -> (p & q)", "r | s", "~s"]),
+            ("Largest", ["p -> (q -> s)", "s -> ~r", "p & q", "r | s"])]
+
+# Load the workload corpus from path, generating and saving it first if the
+# file does not exist
+def workload_corpus(path: str = WORKLOAD_FILE) -> dict:
+    if os.path.exists(path): return pc.load_corpus(path)
+    batches = []
+    for depth in CLAIM_DEPTHS:
+        for (name, args) in ARG_SETS:
+            batches.append((name + "-" + str(depth), args, depth, PROBLEMS_PER_BATCH))
+    corpus = pc.generate_corpus(batches, SEED)
+    pc.save_corpus(corpus, path)
+    return corpus
+
+# Build the workload: the problems of the corpus in path and every state
+# along their (BFS) proofs
+def build_workload(path: str = WORKLOAD_FILE) -> tuple:
+    corpus = workload_corpus(path)
+    problems = []
+    for name in corpus:
+        problems.extend(corpus[name])
+    states = []
+    for (args, claim, depth) in problems:
+        problem = qs.SearchProblem(sh.initial_state(args, claim), sh.proof_complete)
+        plan, node_count = qs.breadth_first_search(problem)
+        state = problem.initial_state
+        states.append(state)
+        for action in plan:
+            state = sh.apply_rule(action, state)
+            states.append(state)
+    return problems, states
+
+# Run fn (which returns the number of operations and nodes it performed)
+# repeatedly for MIN_TIME seconds, then once more under tracemalloc
+def measure(name: str, fn) -> dict:
+    ops = 0
+    nodes = 0
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        (run_ops, run_nodes) = fn()
+        ops += run_ops
+        nodes += run_nodes
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_TIME: break
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"name": name, "runs": runs, "seconds": elapsed,
+            "ops_per_sec": ops / elapsed, "nodes_per_sec": nodes / elapsed,
+            "peak_memory": peak}
+
+# -- Benchmarks: each returns (operations, nodes) --
+
+def bench_applicable_rules(states: list) -> tuple:
+    for state in states: rh.applicable_rules(state)
+    return (len(states), 0)
+
+def bench_apply_rule(states: list) -> tuple:
+    count = 0
+    for state in states:
+        for action in sh.valid_actions(state):
+            sh.apply_rule(action, state)
+            count += 1
+    return (count, 0)
+
+def bench_bfs(problems: list) -> tuple:
+    nodes = 0
+    for (args, claim, depth) in problems:
+        problem = qs.SearchProblem(sh.initial_state(args, claim), sh.proof_complete)
+        plan, node_count = qs.breadth_first_search(problem)
+        nodes += node_count
+    return (len(problems), nodes)
+
+def bench_a_star(problems: list) -> tuple:
+    nodes = 0
+    for (args, claim, depth) in problems:
+        problem = qs.SearchProblem(sh.initial_state(args, claim), sh.proof_complete)
+        plan, node_count = qs.a_star_search(problem, astar.simple_heuristic)
+        nodes += node_count
+    return (len(problems), nodes)
+
+def bench_one_hot_encoding(states: list) -> tuple:
+    for state in states: nn.one_hot_encoding(state)
+    return (len(states), 0)
+
+def bench_batch_encoding(states: list) -> tuple:
+    nn.batch_encoding(states)
+    return (len(states), 0)
+
+def run_benchmarks(path: str = WORKLOAD_FILE) -> list:
+    problems, states = build_workload(path)
+    # The encoder only handles states that fit the network's input
+    encodable = [state for state in states if len(sh.unpack(state)[0]) <= 15]
+    return [measure("applicable_rules", lambda: bench_applicable_rules(states)),
+            measure("apply_rule", lambda: bench_apply_rule(states)),
+            measure("breadth_first_search", lambda: bench_bfs(problems)),
+            measure("a_star_search", lambda: bench_a_star(problems)),
+            measure("one_hot_encoding", lambda: bench_one_hot_encoding(encodable)),
+            measure("batch_encoding", lambda: bench_batch_encoding(encodable))]
+
+def print_results(results: list, previous: list = None) -> None:
+    before = {}
+    if previous is not None:
+        for result in previous: before[result["name"]] = result
+    for result in results:
+        line = "%-22s %12.1f ops/s %12.1f nodes/s %10.1f KiB peak" % (
+            result["name"], result["ops_per_sec"], result["nodes_per_sec"], result["peak_memory"] / 1024)
+        if result["name"] in before and before[result["name"]]["ops_per_sec"] > 0:
+            line += "   (%.2fx)" % (result["ops_per_sec"] / before[result["name"]]["ops_per_sec"])
+        print(line)
+
+
+if __name__ == "__main__":
+    results_file = sys.argv[1] if len(sys.argv) > 1 else RESULTS_FILE
+    previous = None
+    if len(sys.argv) > 2:
+        with open(sys.argv[2]) as f:
+            previous = json.load(f)["results"]
+    results = run_benchmarks()
+    print_results(results, previous)
+    with open(results_file, "w") as f:
+        json.dump({"workload": WORKLOAD_FILE, "results": results}, f, indent=2)
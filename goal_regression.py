@@ -0,0 +1,126 @@
+import solver_helpers as sh
+import rule_helpers as rh
+
+# This file works backward from the claim to find which clauses could
+# contribute to a proof of it. A forward search can then skip any action
+# whose conclusion is not one of these clauses.
+#
+# The regression is an over-approximation: starting from the claim, every
+# rule in rule_dict that could conclude a goal adds its premises as new
+# goals. Premises are drawn from the clauses that could ever appear in a
+# proof, which are built from the subformulas of the args and the claim
+# (see producible_clauses()).
+
+# Maximum number of clauses considered by producible_clauses()
+MAX_CLAUSES = 5000
+
+# Add the clause and all of its subformulas to clauses
+def add_subformulas(clause: str, clauses: set) -> None:
+    stack = [clause]
+    while len(stack) > 0:
+        clause = stack.pop()
+        if clause == "" or clause in clauses: continue
+        clauses.add(clause)
+        (simp, a, b) = rh.parse_expression(clause)
+        for part in (a, b):
+            stack.append(part)
+            stack.append(rh.unwrapped(part))
+
+# Clauses that could be derived from args: the subformulas of the args and
+# claim, the implications hypothetical syllogism can chain together, and
+# the negations modus tollens can conclude (with their subformulas).
+def producible_clauses(args: list, claim: str) -> set:
+    clauses = set()
+    for clause in args + [claim]:
+        add_subformulas(clause, clauses)
+    changed = True
+    while changed and len(clauses) < MAX_CLAUSES:
+        size = len(clauses)
+        implications = [rh.compile_expression(c) for c in clauses if rh.parse_expression(c)[0] == "a -> b"]
+        antecedents = set(f.a for f in implications)
+        consequents = set(f.b for f in implications)
+        for a in antecedents:
+            for b in consequents:
+                add_subformulas(a + " -> " + b, clauses)
+        for f in implications:
+            add_subformulas("~" + rh.grouped(rh.unwrapped(f.a)), clauses)
+        changed = len(clauses) > size
+    return clauses
+
+# Clauses that could contribute to a proof of claim from args
+def relevant_clauses(args: list, claim: str) -> set:
+    clauses = producible_clauses(args, claim)
+    forms = {}
+    for clause in clauses:
+        forms.setdefault(rh.parse_expression(clause)[0], []).append(rh.compile_expression(clause))
+    implications = forms.get("a -> b", [])
+    disjunctions = forms.get("a | b", [])
+    conjunctions = forms.get("a & b", [])
+    atoms = forms.get("a", [])
+
+    relevant = set()
+    goals = [claim]
+    while len(goals) > 0:
+        goal = goals.pop()
+        if goal in relevant: continue
+        relevant.add(goal)
+        (simp, a, b) = rh.parse_expression(goal)
+        # Modus Ponens and Modus Tollens
+        for f in implications:
+            if rh.unwrapped(f.b) == goal: goals.extend([f.text, f.a])
+            if "~" + rh.grouped(rh.unwrapped(f.a)) == goal: goals.extend([f.text, "~" + f.b])
+        # Simplification (including of a conjunction of an atom with itself)
+        for f in conjunctions:
+            if rh.unwrapped(f.a) == goal or rh.unwrapped(f.b) == goal: goals.append(f.text)
+        for f in atoms:
+            if f.text != goal and rh.unwrapped(f.text) == goal:
+                goals.append(rh.wrap(f.text) + " & " + f.text)
+        # Disjunctive Syllogism
+        for f in disjunctions:
+            if rh.unwrapped(f.b) == goal: goals.extend([f.text, "~" + f.a])
+            if rh.unwrapped(f.a) == goal: goals.extend([f.text, "~" + f.b])
+        # Conjunction
+        if simp == "a & b":
+            goals.extend([a, rh.unwrapped(a), b])
+        # Hypothetical Syllogism
+        if simp == "a -> b":
+            for x in implications:
+                if x.a != a: continue
+                for y in implications:
+                    if y.a == x.b and y.b == b: goals.extend([x.text, y.text])
+    return relevant
+
+# Return an action filter (see queue_search.SearchProblem) that drops the
+# actions whose conclusion cannot contribute to proving claim from args
+def relevance_filter(args: list, claim: str):
+    relevant = relevant_clauses(args, claim)
+    def action_filter(state, actions: list) -> list:
+        return [action for action in actions if sh.conclusion(action) in relevant]
+    return action_filter
+
+
+# Return an action filter that drops actions which cannot be useful:
+#
+# - actions whose conclusion is already in args
+# - conjunctions that are not a subformula of the claim or of the initial
+#   args
+# - conjunctions of a clause with itself, unless that is the claim or the
+#   clause is parenthesized (simplifying '(x) & (x)' is the only way to
+#   remove the parenthesis from '(x)')
+def pruning_filter(args: list, claim: str):
+    subformulas = set()
+    for clause in args + [claim]:
+        add_subformulas(clause, subformulas)
+    def action_filter(state, actions: list) -> list:
+        useful = []
+        for action in actions:
+            (form, indices, a, b) = action
+            result = sh.conclusion(action)
+            if sh.contains(state, result): continue
+            if form[0] == "Conjunction":
+                if indices[0] == indices[1]:
+                    if result != claim and a[0:1] != "(": continue
+                elif result not in subformulas: continue
+            useful.append(action)
+        return useful
+    return action_filter
@@ -0,0 +1,106 @@
+import json
+import time
+
+# Profiling of a single search. Pass a SearchProfiler as the profiler argument
+# of queue_search.queue_search() (or the searches built on it) to collect:
+#
+# - timers for each phase of the search, nested as a stack of phase names
+#   (search;expand;rule_matching, search;frontier_pop, ...)
+# - counters such as nodes expanded and generated, duplicates rejected,
+#   stale heap entries popped and heuristic calls
+# - the branching factor at each depth
+#
+# Profiling is off by default; searches only check whether a profiler was
+# given, so there is no cost when it is not.
+#
+# The report comes back as the profile of the search's SearchResult and can
+# be saved as JSON, as a Chrome trace (chrome://tracing or Perfetto) or as
+# collapsed stacks for flamegraph.pl / speedscope.
+
+# Maximum number of trace events kept when tracing
+MAX_EVENTS = 100000
+
+class SearchProfiler(object):
+    def __init__(self, trace: bool = False, max_events: int = MAX_EVENTS):
+        self.trace = trace
+        self.max_events = max_events
+        self.clock = time.perf_counter
+        self.origin = self.clock()
+        # Open phases as [name, start time]
+        self.stack = []
+        # Phase path ("search;expand") -> [total seconds, calls]
+        self.timers = {}
+        self.counters = {}
+        # Depth -> [nodes expanded, children generated]
+        self.depths = {}
+        self.events = []
+
+    def begin(self, name: str):
+        self.stack.append((name, self.clock()))
+
+    def end(self):
+        now = self.clock()
+        path = ";".join(name for (name, start) in self.stack)
+        (name, start) = self.stack.pop()
+        timer = self.timers.get(path)
+        if timer is None: timer = self.timers[path] = [0.0, 0]
+        timer[0] += now - start
+        timer[1] += 1
+        if self.trace and len(self.events) < self.max_events:
+            self.events.append((name, start - self.origin, now - start, len(self.stack)))
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def expanded(self, depth: int, children: int):
+        entry = self.depths.get(depth)
+        if entry is None: entry = self.depths[depth] = [0, 0]
+        entry[0] += 1
+        entry[1] += children
+
+    # Wrap func so each call is timed as phase name and counted as counter
+    def wrap(self, func, name: str, counter: str):
+        def profiled(*args):
+            self.count(counter)
+            self.begin(name)
+            try:
+                return func(*args)
+            finally:
+                self.end()
+        return profiled
+
+    # Timers, counters and branching factors as a JSON-compatible dict
+    def report(self) -> dict:
+        branching = {}
+        for depth in sorted(self.depths):
+            (expanded, generated) = self.depths[depth]
+            branching[depth] = {"expanded": expanded, "generated": generated, "factor": generated / expanded}
+        timers = {path: {"seconds": total, "calls": calls} for path, (total, calls) in sorted(self.timers.items())}
+        return {"timers": timers, "counters": dict(sorted(self.counters.items())), "branching": branching}
+
+    def to_json(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+
+    # Trace events in the Chrome trace event format (needs trace=True)
+    def chrome_trace(self) -> dict:
+        events = [{"name": name, "ph": "X", "ts": start * 1e6, "dur": duration * 1e6, "pid": 0, "tid": 0}
+                  for (name, start, duration, depth) in self.events]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save_chrome_trace(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+    # Lines of "phase;subphase microseconds" giving the time spent in each
+    # phase itself (not in its subphases), as read by flamegraph.pl
+    def collapsed_stacks(self) -> list:
+        own = {path: total for path, (total, calls) in self.timers.items()}
+        for path, (total, calls) in self.timers.items():
+            parent = path.rpartition(";")[0]
+            if parent in own: own[parent] -= total
+        return ["%s %d" % (path, max(0, round(seconds * 1e6))) for path, seconds in sorted(own.items())]
+
+    def save_collapsed_stacks(self, path: str):
+        with open(path, "w") as f:
+            f.write("\n".join(self.collapsed_stacks()) + "\n")
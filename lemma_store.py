@@ -0,0 +1,137 @@
+import solver_helpers as sh
+import queue_search as qs
+
+# A store of lemmas (derived clauses) shared between problems with the same
+# assumptions, such as the problems of one automated_experiments batch.
+#
+# For each assumption set, the store keeps every clause derived in a recorded
+# plan together with its derivation: only the plan steps the clause depends
+# on, so each derivation is as short as the plans it was taken from. Later
+# searches add up to max_lemmas of these clauses (shortest derivations first)
+# to the assumptions, then splice the derivations of the lemmas they used
+# back into the plan so it proves the claim from the original assumptions.
+# A problem's own claim is never added as a lemma, and search() does not
+# record lemmas, so several searches of one problem (as in
+# automated_experiments.py) can be compared before record() is called.
+#
+# Derivations are stored with their arg indices relative to the sorted,
+# de-duplicated assumptions: index i < m is the i-th of the m assumptions and
+# index m + j is the clause derived by step j of the derivation.
+
+MAX_LEMMAS = 20
+
+# The canonical (sorted, de-duplicated) assumptions, used as the store key
+def canonical_args(args: list) -> tuple:
+    return tuple(sorted(set(args)))
+
+# The steps of plan that the step at position step depends on (including
+# itself), in plan order. n is the number of assumptions.
+def dependencies(plan: list, step: int, n: int) -> list:
+    needed = set()
+    pending = [step]
+    while len(pending) > 0:
+        j = pending.pop()
+        if j in needed: continue
+        needed.add(j)
+        for (arg_idx, rule_idx) in plan[j][1]:
+            if arg_idx >= n: pending.append(arg_idx - n)
+    return sorted(needed)
+
+# Copy the given steps of plan, re-indexing args so that index_map[i] is the
+# new index of assumption i and each copied step refers to the copies of the
+# steps before it. n is the number of assumptions in plan's indices and m the
+# number in the new indices.
+def extract_derivation(plan: list, steps: list, index_map: dict, n: int, m: int) -> list:
+    position = dict(index_map)
+    derivation = []
+    for j in steps:
+        (form, indices, a, b) = plan[j]
+        derivation.append((form, [(position[arg_idx], rule_idx) for (arg_idx, rule_idx) in indices], a, b))
+        position[n + j] = m + len(derivation) - 1
+    return derivation
+
+class LemmaStore(object):
+    def __init__(self, max_lemmas: int = MAX_LEMMAS):
+        self.max_lemmas = max_lemmas
+        # canonical args -> {clause: derivation}
+        self.lemmas = {}
+
+    def __len__(self):
+        return sum(len(lemmas) for lemmas in self.lemmas.values())
+
+    # The clauses to add to args before searching for claim (shortest
+    # derivations first)
+    def lemma_clauses(self, args: list, claim: str = None) -> list:
+        lemmas = self.lemmas.get(canonical_args(args), {})
+        clauses = sorted(lemmas, key=lambda clause: (len(lemmas[clause]), clause))
+        return [clause for clause in clauses if clause not in args and clause != claim][:self.max_lemmas]
+
+    # Record every clause derived by plan (which applies to a state built
+    # from args), keeping the shorter derivation of each clause
+    def record(self, args: list, plan: list):
+        key = canonical_args(args)
+        lemmas = self.lemmas.setdefault(key, {})
+        position = {clause: i for i, clause in enumerate(key)}
+        index_map = {i: position[arg] for i, arg in enumerate(args)}
+        for j in range(len(plan)):
+            clause = sh.conclusion(plan[j])
+            if clause in position: continue
+            steps = dependencies(plan, j, len(args))
+            if clause in lemmas and len(lemmas[clause]) <= len(steps): continue
+            lemmas[clause] = extract_derivation(plan, steps, index_map, len(args), len(key))
+
+    # Turn plan, found for a state built from args + lemmas with the given
+    # claim, into a plan for a state built from args alone by splicing in
+    # the derivation of each lemma the plan uses (clauses already derived
+    # are not derived again)
+    def splice(self, args: list, lemmas: list, plan: list, claim: str) -> list:
+        key = canonical_args(args)
+        derivations = self.lemmas[key]
+        first = {}
+        for i, arg in enumerate(args): first.setdefault(arg, i)
+        canonical_map = {c: first[clause] for c, clause in enumerate(key)}
+        # Clause -> index in the spliced state
+        clause_index = dict(first)
+        spliced = []
+
+        def add_step(form, indices, a, b):
+            clause = sh.conclusion((form, indices, a, b))
+            if clause not in clause_index:
+                clause_index[clause] = len(args) + len(spliced)
+                spliced.append((form, indices, a, b))
+            return clause_index[clause]
+
+        def add_lemma(clause):
+            if clause in clause_index: return clause_index[clause]
+            local = dict(canonical_map)
+            for step, (form, indices, a, b) in enumerate(derivations[clause]):
+                local[len(key) + step] = add_step(form, [(local[i], r) for (i, r) in indices], a, b)
+            return clause_index[clause]
+
+        n = len(args)
+        k = len(lemmas)
+        plan_index = {}
+        for j, (form, indices, a, b) in enumerate(plan):
+            new_indices = []
+            for (arg_idx, rule_idx) in indices:
+                if arg_idx < n: new_index = arg_idx
+                elif arg_idx < n + k: new_index = add_lemma(lemmas[arg_idx - n])
+                else: new_index = plan_index[arg_idx]
+                new_indices.append((new_index, rule_idx))
+            plan_index[n + k + j] = add_step(form, new_indices, a, b)
+        # The claim itself may be a lemma
+        if claim in lemmas: add_lemma(claim)
+        return spliced
+
+    # Prove claim from args with search (a function taking a SearchProblem
+    # and returning a SearchResult, e.g. queue_search.breadth_first_search),
+    # starting from args plus the known lemmas. Returns a SearchResult whose
+    # plan applies to a state built from args (record() its plan to keep
+    # its lemmas).
+    def search(self, args: list, claim: str, search) -> qs.SearchResult:
+        lemmas = self.lemma_clauses(args, claim)
+        problem = qs.SearchProblem(sh.initial_state(list(args) + lemmas, claim), sh.proof_complete)
+        result = search(problem)
+        plan = self.splice(args, lemmas, result.plan, claim) if len(lemmas) > 0 else result.plan
+        return qs.SearchResult(plan, result.node_count, result.status, result.elapsed,
+                               result.frontier_size, result.max_depth)
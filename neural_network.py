@@ -6,43 +6,104 @@ import numpy as np
 import solver_helpers as sh
 import random
 import baseline_ai as baseline
+import problem_corpus as pc
 import queue_search as qs
 import a_star_heuristic as astar
 import torch as tr
 import matplotlib.pyplot as plt
 import time
 
+# Training data is drawn from the saved corpus at CORPUS (see
+# problem_corpus.py) when it is set, otherwise claims are generated. Set SEED
+# to make the training and testing data reproducible.
+CORPUS = None
+SEED = None
+
 # A mechanism for one-hot encoding. A few key limitations:
-#   - Max number of args is seven
+#   - Max number of args is fifteen
 #   - Max clause length is eight (discluding spaces)
+#   - Max number of distinct literals is seven
 #
 # Returns an 16x8x8 tensor. Rows represent different clauses
 # and columns represent different literals/operators/parens
 # in an individual clause.
 def one_hot_encoding(state: tuple):
-    (args, claim, hist) = sh.unpack(state)
-
-    encoded_state = []
-    literals = []
-    row = 0
-    for clause in args:
-        exp = clause
-        
-        # Helper function encodes clause
-        encoded_clause, literals = clause_encoding(exp, literals)   
-        encoded_state.append(encoded_clause)
-
-    # Add column padding
-    for i in range(15 - len(encoded_state)): 
-        encoded_tmp = []
-        for j in range(8):
-            encoded_tmp.append([0,0,0,0,0,0,0,0])
-        encoded_state.append(encoded_tmp)
-
-    # Add claim
-    encoded_clause, literals = clause_encoding(claim, literals)
-    encoded_state.append(encoded_clause)
-    return tr.tensor(encoded_state, dtype=tr.float32) # np.array(encoded_state, dtype=object)
+    return batch_encoding([state])[0]
+
+
+# Encode a list of states into a single (batch)x16x8x8 tensor. Each clause
+# is tokenized once (see clause_tokens) and the ones are written into a
+# preallocated buffer with a single fancy-indexing assignment.
+def batch_encoding(states: list):
+    encoded = np.zeros((len(states), 16, 8, 8), dtype=np.float32)
+    batch_idx, row_idx, pos_idx, col_idx = [], [], [], []
+    for b in range(len(states)):
+        (args, claim) = state_clauses(states[b])
+        if len(args) > 15: raise ValueError("Cannot encode more than 15 args")
+        literals = {}
+        rows = list(enumerate(args))
+        rows.append((15, claim))
+        for (row, clause) in rows:
+            (op_pos, op_col, lit_pos, lit_chars) = clause_tokens(clause)
+            n = len(op_pos) + len(lit_pos)
+            batch_idx.extend([b] * n)
+            row_idx.extend([row] * n)
+            pos_idx.extend(op_pos)
+            col_idx.extend(op_col)
+            # Literals are numbered in the order they appear in the state
+            for c in lit_chars:
+                lit = literals.setdefault(c, len(literals))
+                if lit > 6: raise ValueError("Cannot encode more than 7 literals")
+                col_idx.append(lit + 1)
+            pos_idx.extend(lit_pos)
+    encoded[batch_idx, row_idx, pos_idx, col_idx] = 1
+    return tr.from_numpy(encoded)
+
+# The args (in order) and claim of a state. The encoding depends on the
+# order of the clauses, so a ClauseLog is read along its chain (without
+# building its hist as sh.unpack() does).
+def state_clauses(state) -> tuple:
+    if isinstance(state, sh.ClauseLog): return state.args(), state.claim
+    return state[0], state[1]
+
+
+# Maximum number of tokenized clauses kept by clause_tokens()
+TOKEN_CACHE_SIZE = 10000
+
+# Column of the encoding used by each operator
+operator_columns = {"(": 1, ")": 2, "~": 3, "&": 4, "|": 5, "-": 6}
+
+_token_cache = {}
+
+# Tokenize a clause for batch_encoding(). Returns the positions and columns
+# of the ones the operators set and the positions and characters of the
+# literals.
+def clause_tokens(clause: str) -> tuple:
+    tokens = _token_cache.get(clause)
+    if tokens is not None: return tokens
+    op_pos, op_col, lit_pos, lit_chars = [], [], [], []
+    pos = 0
+    i = 0
+    while i < len(clause):
+        c = clause[i]
+        if c == ' ':
+            i += 1
+            continue
+        if c in operator_columns:
+            op_pos.append(pos)
+            op_col.append(operator_columns[c])
+        else:
+            lit_pos.append(pos)
+            lit_chars.append(c)
+        i += 2 if c == "-" else 1  # '->' Operator
+        pos += 1
+    if pos > 8: raise ValueError("Cannot encode clause longer than 8 symbols: " + clause)
+    # Each operator sets column 0 as well as its own column
+    tokens = (op_pos + op_pos, [0] * len(op_col) + op_col, lit_pos, lit_chars)
+    while len(_token_cache) >= TOKEN_CACHE_SIZE:
+        del _token_cache[next(iter(_token_cache))]
+    _token_cache[clause] = tokens
+    return tokens
     
 
 # A helper method for one_hot_encoding that encodes a single
@@ -88,8 +149,12 @@ def clause_encoding(exp: str, literals: list) -> list:
     return encoded_clause, literals
 
 
-# Generate training/testing data for the neural network
-def generate_data(count=500) -> list:
+# Generate training/testing data for the neural network. Problems are drawn
+# from corpus (a list of (args, claim, depth) records, see problem_corpus.py)
+# when given, otherwise claims are generated from the lists below. Passing a
+# seed makes the data reproducible.
+def generate_data(count=500, corpus=None, seed=None) -> list:
+    rng = random.Random(seed)
     # Initial args (based on automated_experiments.py)
     arg_list = [["p -> q", "q -> r", "p", "q"],
                 ["p -> q", "q -> r", "s & ~q", "~r"],
@@ -102,12 +167,12 @@ def generate_data(count=500) -> list:
     result_list = []
 
     while len(state_list) < count:
-        args = random.choice(arg_list)
-
-        # Generate the claim to prove by a series of random actions applied to args
-        generation_state = sh.initial_state(args, "claim")
-        (generation_state, x, y) = baseline.apply_random_actions(generation_state)
-        claim = sh.unpack(generation_state)[0][-1]
+        if corpus is not None:
+            (args, claim, depth) = rng.choice(corpus)
+        else:
+            args = rng.choice(arg_list)
+            # Generate the claim to prove by a series of random actions applied to args
+            claim = pc.generate_claim(args, 100, rng)
 
         state = sh.initial_state(args, claim)        
         problem = qs.SearchProblem(state, sh.proof_complete)
@@ -119,7 +184,7 @@ def generate_data(count=500) -> list:
             states_astar.append(sh.apply_rule(plan_astar[a], states_astar[-1]))
 
         # Select random state to add as data
-        data_idx = random.randint(0, len(states_astar)-1)
+        data_idx = rng.randint(0, len(states_astar)-1)
         state_data = states_astar[data_idx]
         label = (len(states_astar)-data_idx-1)
 
@@ -147,7 +212,10 @@ def batch_error(net, batch):
 #   Availability:   CIS 667, Lecture 12/05/2022
 #   https://drive.google.com/file/d/1QF8IJHlZ597esIU-vmW7u9KARhyXIjOY/edit?pli=1
 
-def train_nn():
+# Train the network on problems from corpus (a list of (args, claim, depth)
+# records) if given. The testing data is generated with seed + 1 so that it
+# differs from the training data.
+def train_nn(corpus=None, seed=None):
     nn = tr.nn.Sequential(
         tr.nn.Linear(8, 640),
         tr.nn.ReLU(),
@@ -161,15 +229,15 @@ def train_nn():
 
     # Training Data
     print("\nCreating training data...\n")
-    training_set = generate_data(count=500)
+    training_set = generate_data(count=500, corpus=corpus, seed=seed)
     states, utilities = training_set
-    training_batch = tr.stack(tuple(map(one_hot_encoding, states))), tr.tensor(utilities)
+    training_batch = batch_encoding(states), tr.tensor(utilities)
 
     # Testing Data
     print("Creating testing data...\n")
-    testing_set = generate_data(count=200)
+    testing_set = generate_data(count=200, corpus=corpus, seed=None if seed is None else seed + 1)
     states, utilities = testing_set
-    testing_batch = tr.stack(tuple(map(one_hot_encoding, states))), tr.tensor(utilities)
+    testing_batch = batch_encoding(states), tr.tensor(utilities)
 
     # Run the gradient descent iterations
     print("Running gradient descent...\n")
@@ -212,4 +280,7 @@ def train_nn():
 
 # Run file (main) to train the neural network
 if __name__ == "__main__":
-    train_nn()
\ No newline at end of file
+    corpus = None
+    if CORPUS is not None:
+        corpus = [problem for batch in pc.load_corpus(CORPUS).values() for problem in batch]
+    train_nn(corpus, SEED)
\ No newline at end of file
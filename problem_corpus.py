@@ -0,0 +1,81 @@
+import random
+import json
+import gzip
+import solver_helpers as sh
+import queue_search as qs
+import baseline_ai as baseline
+
+# This file generates a fixed corpus of problems so that benchmark and
+# experiment runs can be repeated on exactly the same claims. A corpus maps
+# a batch name to a list of records of the form (args, claim, depth), where
+# depth is the length of the shortest proof (found with BFS).
+#
+# Running this file writes the corpus for the batches used in
+# automated_experiments.py to CORPUS_FILE.
+
+CORPUS_FILE = "problem_corpus.json.gz"
+SEED = 667
+
+# Batches from automated_experiments.py: (name, args, claim_depth, count)
+EXPERIMENT_BATCHES = [("Smallest", ["p -> q", "q -> r", "p", "q"], 10, 100),
+                      ("Small", ["p -> q", "q -> r", "s & ~q", "~r"], 50, 100),
+                      ("Medium", ["p -> q", "~s & (q -> r)", "p", "t -> s"], 100, 100),
+                      ("Large", ["p -> q", "r -> (p & q)", "r | s", "~s"], 100, 100),
+                      ("Largest", ["p -> (q -> s)", "s -> ~r", "p & q", "r | s"], 200, 100)]
+
+# Generate a claim by applying claim_depth random actions to args
+def generate_claim(args: list, claim_depth: int, rng) -> str:
+    generation_state = sh.initial_state(args, "claim")
+    (generation_state, x, y) = baseline.apply_random_actions(generation_state, count=claim_depth, rng=rng)
+    return sh.unpack(generation_state)[0][-1]
+
+# Generate count records over the given args
+def generate_records(args: list, claim_depth: int, count: int, rng) -> list:
+    records = []
+    for i in range(count):
+        claim = generate_claim(args, claim_depth, rng)
+        problem = qs.SearchProblem(sh.initial_state(args, claim), sh.proof_complete)
+        plan, node_count = qs.breadth_first_search(problem)
+        records.append((list(args), claim, len(plan)))
+    return records
+
+# Generate a corpus for a list of (name, args, claim_depth, count) batches.
+# Each batch draws from its own generator seeded from seed and the batch
+# name, so a batch does not change when others are added or removed.
+def generate_corpus(batches: list, seed: int) -> dict:
+    corpus = {}
+    for (name, args, claim_depth, count) in batches:
+        rng = random.Random(str(seed) + ":" + name)
+        corpus[name] = generate_records(args, claim_depth, count, rng)
+    return corpus
+
+# Save a corpus as gzipped JSON. The args of each batch are stored once.
+def save_corpus(corpus: dict, path: str) -> None:
+    data = {}
+    for name in corpus:
+        arg_lists = []
+        problems = []
+        for (args, claim, depth) in corpus[name]:
+            if args not in arg_lists: arg_lists.append(args)
+            problems.append([arg_lists.index(args), claim, depth])
+        data[name] = {"args": arg_lists, "problems": problems}
+    with gzip.open(path, "wt") as f:
+        json.dump(data, f, separators=(",", ":"))
+
+# Load a corpus written by save_corpus()
+def load_corpus(path: str) -> dict:
+    with gzip.open(path, "rt") as f:
+        data = json.load(f)
+    corpus = {}
+    for name in data:
+        arg_lists = data[name]["args"]
+        corpus[name] = [(arg_lists[i], claim, depth) for (i, claim, depth) in data[name]["problems"]]
+    return corpus
+
+
+if __name__ == "__main__":
+    corpus = generate_corpus(EXPERIMENT_BATCHES, SEED)
+    save_corpus(corpus, CORPUS_FILE)
+    for name in corpus:
+        depths = [depth for (args, claim, depth) in corpus[name]]
+        print(name + ": " + str(len(depths)) + " problems, average depth " + str(sum(depths) / len(depths)))
@@ -0,0 +1,113 @@
+import json
+import time
+import sqlite3
+import rule_helpers as rh
+
+# A persistent cache of search results, stored in SQLite so that repeated
+# (assumptions, claim) problems are answered without searching.
+#
+# Problems are keyed on the search method and their canonical form: the
+# sorted, de-duplicated assumptions and the claim, so the same problem with
+# its assumptions in a different order (or repeated) shares one entry. Each
+# method has its own entries, since node counts (and for some methods proof
+# lengths) differ between methods. Plans are stored with
+# their arg indices in the canonical order and remapped to the order of the
+# assumptions on lookup.
+#
+# Each entry records when it was last used; once the cache holds more than
+# max_entries problems the least recently used are evicted. The count is
+# read from the database, so the limit holds when several processes share
+# one cache file.
+
+CACHE_FILE = "proof_cache.db"
+MAX_ENTRIES = 100000
+
+# The canonical (sorted, de-duplicated) assumptions and the cache key for
+# solving claim from args with method
+def canonical_form(args: list, claim: str, method: str) -> tuple:
+    canonical_args = sorted(set(arg.strip() for arg in args))
+    return canonical_args, json.dumps([method, canonical_args, claim.strip()])
+
+# Map each index of a state built from args (assumptions first, then derived
+# clauses) to the same clause's index in a state built from canonical_args
+def canonical_indices(args: list, canonical_args: list) -> dict:
+    position = {arg: i for i, arg in enumerate(canonical_args)}
+    return {i: position[arg.strip()] for i, arg in enumerate(args)}
+
+# Replace the arg index of every action in plan using index_map; derived
+# clauses (at or after from_count) move to after to_count assumptions
+def remap_plan(plan: list, index_map: dict, from_count: int, to_count: int) -> list:
+    remapped = []
+    for (form, indices, a, b) in plan:
+        new_indices = []
+        for (arg_idx, rule_idx) in indices:
+            arg_idx = index_map[arg_idx] if arg_idx < from_count else arg_idx - from_count + to_count
+            new_indices.append((arg_idx, rule_idx))
+        remapped.append((form, new_indices, a, b))
+    return remapped
+
+# Plans are stored as JSON, with each rule as its position in rule_dict
+def encode_plan(plan: list) -> str:
+    return json.dumps([[rh.rule_dict.index(form), indices, a, b] for (form, indices, a, b) in plan])
+
+def decode_plan(text: str) -> list:
+    return [(rh.rule_dict[rule], [tuple(index) for index in indices], a, b)
+            for (rule, indices, a, b) in json.loads(text)]
+
+class ProofCache(object):
+    def __init__(self, path: str = CACHE_FILE, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        # Several processes may share one cache file (see batch_solver.py)
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS proofs (key TEXT PRIMARY KEY, plan TEXT, status TEXT, "
+                        "node_count INTEGER, time REAL, last_used REAL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS proofs_last_used ON proofs (last_used)")
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM proofs").fetchone()[0]
+
+    # Returns a dict with the status, plan (for args in their given order),
+    # node_count and time of the stored search by method, or None if it is
+    # not cached
+    def lookup(self, args: list, claim: str, method: str) -> dict:
+        (canonical_args, key) = canonical_form(args, claim, method)
+        row = self.db.execute("SELECT plan, status, node_count, time FROM proofs WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.db.execute("UPDATE proofs SET last_used = ? WHERE key = ?", (time.time(), key))
+        (plan, status, node_count, search_time) = row
+        # Canonical index -> first index of the same assumption in args
+        index_map = {}
+        for i, c in sorted(canonical_indices(args, canonical_args).items(), reverse=True): index_map[c] = i
+        plan = remap_plan(decode_plan(plan), index_map, len(canonical_args), len(args))
+        return {"status": status, "plan": plan, "node_count": node_count, "time": search_time}
+
+    # Store the result of a search by method for args and claim (plan in the
+    # order of args)
+    def store(self, args: list, claim: str, method: str, plan: list, status: str, node_count: int,
+              search_time: float):
+        (canonical_args, key) = canonical_form(args, claim, method)
+        plan = remap_plan(plan, canonical_indices(args, canonical_args), len(args), len(canonical_args))
+        self.db.execute("INSERT OR REPLACE INTO proofs VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, encode_plan(plan), status, node_count, search_time, time.time()))
+        size = len(self)
+        if size > self.max_entries: self.evict(size - self.max_entries)
+
+    # Remove the count least recently used entries
+    def evict(self, count: int):
+        self.db.execute("DELETE FROM proofs WHERE key IN (SELECT key FROM proofs ORDER BY last_used LIMIT ?)", (count,))
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self), "max_entries": self.max_entries}
+
+    def clear(self):
+        self.db.execute("DELETE FROM proofs")
+
+    def close(self):
+        self.db.close()
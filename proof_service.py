@@ -0,0 +1,140 @@
+import os
+import json
+import asyncio
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import torch as tr
+import queue_search as qs
+import run_solver as rs
+
+# This file serves proof requests over a local TCP socket:
+#
+#   python proof_service.py [--host HOST] [--port PORT] [--workers N]
+#
+# Each request is one line of JSON, for example
+#
+#   {"id": 1, "assumptions": ["p -> q", "p"], "claim": "q", "method": "4"}
+#
+# where method is one of run_solver.SOLVE_METHODS ('4' by default) and an
+# optional "timeout" (seconds) overrides the service default. Each response is
+# one line of JSON with the request's id and either the result of
+# run_solver.solve_claim() (status, proof, node_count and time) or an error.
+# Responses on a connection are written as requests finish, so they may come
+# back in a different order than the requests were sent.
+#
+# Proofs are searched on a process pool; each worker loads the neural network
+# once when it starts. At most MAX_PENDING requests are in progress at a time;
+# further requests are not read until one finishes.
+
+HOST = "127.0.0.1"
+PORT = 6670
+WORKERS = os.cpu_count()
+MAX_PENDING = 64
+# Default time limit (seconds) for one request
+TIMEOUT = 30.0
+# Extra time allowed for a worker to stop once a request's time limit is up
+TIMEOUT_GRACE = 5.0
+
+# Load the network once per worker (if it has been trained)
+def init_worker(net_path: str):
+    tr.set_num_threads(1)
+    if os.path.exists(net_path): rs.load_network(net_path)
+
+# Solve one request in a worker. The search itself stops at the time limit, so
+# a request that cannot be proven does not keep the worker busy.
+def solve_request(assumptions: list, claim: str, method: str, timeout: float) -> dict:
+    result = rs.solve_claim(assumptions, claim, method, qs.SearchBudget(max_seconds=timeout))
+    result.pop("plan")
+    result["proof"] = [list(line) for line in result["proof"]]
+    return result
+
+class ProofService(object):
+    def __init__(self, workers: int = WORKERS, max_pending: int = MAX_PENDING, timeout: float = TIMEOUT,
+                 net_path: str = "saved_net.pt"):
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(net_path,))
+        self.pending = asyncio.Semaphore(max_pending)
+        self.timeout = timeout
+        self.server = None
+
+    async def start(self, host: str = HOST, port: int = PORT):
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.pool.shutdown(cancel_futures=True)
+
+    async def handle_connection(self, reader, writer):
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line: break
+                if len(line.strip()) == 0: continue
+                # Wait for a free slot before reading more requests
+                await self.pending.acquire()
+                task = asyncio.ensure_future(self.respond(line, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if len(tasks) > 0: await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    async def respond(self, line: bytes, writer, write_lock):
+        try:
+            response = await self.handle_request(line)
+        finally:
+            self.pending.release()
+        async with write_lock:
+            writer.write((json.dumps(response) + "\n").encode())
+            await writer.drain()
+
+    # Returns the response for one line of JSON
+    async def handle_request(self, line: bytes) -> dict:
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            assumptions = [str(arg) for arg in request["assumptions"]]
+            claim = str(request["claim"])
+            method = str(request.get("method", "4"))
+            timeout = float(request.get("timeout", self.timeout))
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            return {"id": None, "error": "Invalid request: %s" % e}
+        if method not in rs.SOLVE_METHODS:
+            return {"id": request_id, "error": "Invalid solving method: %s" % method}
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.pool, solve_request, assumptions, claim, method, timeout)
+        try:
+            result = await asyncio.wait_for(future, timeout + TIMEOUT_GRACE)
+        except asyncio.TimeoutError:
+            return {"id": request_id, "error": "Timed out after %s seconds" % timeout}
+        except Exception as e:
+            return {"id": request_id, "error": "%s: %s" % (type(e).__name__, e)}
+        result["id"] = request_id
+        return result
+
+async def serve(host: str, port: int, workers: int, max_pending: int, timeout: float):
+    service = ProofService(workers, max_pending, timeout)
+    port = await service.start(host, port)
+    print("Serving proofs on %s:%d" % (host, port))
+    try:
+        await service.server.serve_forever()
+    finally:
+        await service.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve proof requests as line-delimited JSON over TCP.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--max-pending", type=int, default=MAX_PENDING)
+    parser.add_argument("--timeout", type=float, default=TIMEOUT)
+    options = parser.parse_args()
+    try:
+        asyncio.run(serve(options.host, options.port, options.workers, options.max_pending, options.timeout))
+    except KeyboardInterrupt:
+        pass
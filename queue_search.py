@@ -1,7 +1,12 @@
 import heapq as hq
-from collections import deque
+import os
+import sys
+import time
+import threading
+from collections import deque, OrderedDict
 import solver_helpers as sh
 import rule_helpers as rh
+import goal_regression as gr
 
 # Note that the queue search code below is written based
 # on function implementations from the following source.
@@ -9,29 +14,68 @@ import rule_helpers as rh
 #   Author:         Garrett Katz
 #   Availability:   CIS 667, Homework 01
 
+# Search nodes use __slots__ to keep memory per node small. A node does not
+# keep its children, and only builds its rule index when it is expanded.
 class SearchNode(object):
-    def __init__(self, problem, state, parent=None, action=None, step_cost=0, depth=0):
+    __slots__ = ("problem", "state", "key", "index", "parent", "action", "path_cost", "path_risk", "depth")
+
+    def __init__(self, problem, state, parent=None, action=None, step_cost=0, depth=0, h=None):
         self.problem = problem
         self.state = state
+        self.key = sh.state_key(state)
+        # Rule matches for state; frontier nodes only hold the parent link and
+        # action, and rule_index() builds this when the node is expanded
+        self.index = None
         self.parent = parent
         self.action = action
-        self.step_cost = step_cost
         self.path_cost = step_cost + (0 if parent is None else parent.path_cost)
-        self.path_risk = self.path_cost + problem.heuristic(state)
+        if h is None: h = problem.heuristic(state)
+        self.path_risk = self.path_cost + h
         self.depth = depth
-        self.child_list = []
     def is_goal(self):
         return self.problem.is_goal(self.state)
     def children(self):
-        if len(self.child_list) > 0: return self.child_list
-        for action in sh.valid_actions(self.state):
-            new_state = sh.apply_rule(action, self.state)
-            self.child_list.append(
-                SearchNode(self.problem, new_state, self, action, 1, depth=self.depth+1))
-        return self.child_list
+        profiler = self.problem.profiler
+        if profiler is not None: profiler.begin("rule_matching")
+        index = self.rule_index()
+        actions = index.actions(self.state)
+        if self.problem.action_filter is not None:
+            actions = self.problem.action_filter(self.state, actions)
+        if profiler is not None:
+            profiler.end()
+            profiler.begin("apply_rule")
+        new_states = [sh.apply_rule(action, self.state) for action in actions]
+        if profiler is not None: profiler.end()
+        # Score all children with one call when a batched heuristic is set
+        if self.problem.batch_heuristic is not None and len(new_states) > 0:
+            h_values = self.problem.batch_heuristic(new_states)
+        else:
+            h_values = [None] * len(new_states)
+        if profiler is not None: profiler.begin("node_creation")
+        child_list = []
+        for i in range(len(actions)):
+            child_list.append(
+                SearchNode(self.problem, new_states[i], self, actions[i], 1, depth=self.depth+1, h=h_values[i]))
+        if profiler is not None:
+            profiler.end()
+            profiler.expanded(self.depth, len(child_list))
+        return child_list
+    # The node keeps its index once built, since its children extend it
+    def rule_index(self):
+        if self.index is None:
+            if self.parent is not None and self.parent.index is not None:
+                self.index = self.parent.index.extend(sh.conclusion(self.action))
+            else:
+                self.index = rh.index_state(self.state)
+        return self.index
     def path(self):
-        if self.parent == None: return []
-        return self.parent.path() + [self.action]
+        plan = []
+        node = self
+        while node.parent is not None:
+            plan.append(node.action)
+            node = node.parent
+        plan.reverse()
+        return plan
 
 class SearchProblem(object):
     def __init__(self, initial_state, is_goal = None):
@@ -39,75 +83,642 @@ class SearchProblem(object):
         self.initial_state = initial_state
         self.is_goal = is_goal
         self.heuristic = lambda s: 0
+        # Optional heuristic taking a list of states and returning a list
+        # of values; used in place of heuristic when expanding a node
+        self.batch_heuristic = None
+        # Optional function (state, actions) -> actions used to prune the
+        # actions considered when expanding a node
+        self.action_filter = None
+        # Optional instrumentation.SearchProfiler (see queue_search())
+        self.profiler = None
     def root_node(self):
-        return SearchNode(self, self.initial_state)
+        return SearchNode(self, sh.persistent_state(self.initial_state))
 
+# Frontiers and the explored set compare nodes by node.key (the canonical
+# state key) rather than the full state tuple
 class FIFOFrontier:
     def __init__(self):
         self.queue_nodes = deque()
         self.queue_states = set()
     def __len__(self):
         return len(self.queue_states)
+    # Returns False if the node's state was already on the frontier
     def push(self, node):
-        if node.state not in self.queue_states:
-            self.queue_nodes.append(node)
-            self.queue_states.add(node.state)
+        if node.key in self.queue_states: return False
+        self.queue_nodes.append(node)
+        self.queue_states.add(node.key)
+        return True
     def pop(self):
         node = self.queue_nodes.popleft()
-        self.queue_states.remove(node.state)
+        self.queue_states.remove(node.key)
         return node
     def is_not_empty(self):
         return len(self.queue_nodes) > 0
 
+# Replaced entries are left in the heap (marked as removed) and skipped when
+# popped. Once more than stale_ratio of the heap is stale (and the heap holds
+# at least MIN_COMPACT_SIZE entries), the stale entries are dropped and the
+# heap is rebuilt, so its size stays proportional to the live frontier.
+STALE_RATIO = 0.5
+MIN_COMPACT_SIZE = 64
+
 class PriorityHeapFIFOFrontier(object):
-    def __init__(self):
+    def __init__(self, stale_ratio=STALE_RATIO):
         self.heap = []
         self.state_lookup = {}
         self.count = 0
+        self.stale_ratio = stale_ratio
+        # Number of stale entries in the heap
+        self.stale = 0
+        # Number of replaced entries popped and discarded
+        self.stale_popped = 0
+        self.compactions = 0
 
+    # Returns False if the node's state was already on the frontier with a
+    # path_risk no higher than node's
     def push(self, node):
-        if node.state in self.state_lookup:
-            entry = self.state_lookup[node.state]
-            if entry[0] <= node.path_risk: return
+        if node.key in self.state_lookup:
+            entry = self.state_lookup[node.key]
+            if entry[0] <= node.path_risk: return False
             entry[-1] = True
+            self.stale += 1
         new_entry = [node.path_risk, self.count, node, False]
         hq.heappush(self.heap, new_entry)
-        self.state_lookup[node.state] = new_entry
+        self.state_lookup[node.key] = new_entry
         self.count += 1
+        if self.stale > self.stale_ratio * len(self.heap) and len(self.heap) >= MIN_COMPACT_SIZE: self.compact()
+        return True
 
     def pop(self):
         while len(self.heap) > 0:
             risk, count, node, already_removed = hq.heappop(self.heap)
-            if not already_removed:
-                self.state_lookup.pop(node.state)
+            if already_removed:
+                self.stale -= 1
+                self.stale_popped += 1
+            else:
+                self.state_lookup.pop(node.key)
                 return node
 
+    # Drop the stale entries and rebuild the heap
+    def compact(self):
+        self.heap = [entry for entry in self.heap if not entry[-1]]
+        hq.heapify(self.heap)
+        self.stale = 0
+        self.compactions += 1
+
+    def __len__(self):
+        return len(self.state_lookup)
+
     def is_not_empty(self):
-        return len(self.heap) > 0
+        return len(self.state_lookup) > 0
 
     def states(self):
         return list(self.state_lookup.keys())
 
-def queue_search(frontier, problem):
+# Frontier with the same (path_risk, first pushed) order as
+# PriorityHeapFIFOFrontier, kept in an indexed d-ary heap. Each state has
+# exactly one entry, and pushing a state at a lower path_risk moves its entry
+# up the heap (decrease-key) instead of leaving a stale entry behind. A larger
+# d makes the heap shallower, so pushes are cheaper and pops compare more
+# children per level.
+class IndexedHeapFrontier(object):
+    def __init__(self, d=4):
+        self.d = d
+        # Entries of [path_risk, count, node]
+        self.heap = []
+        # State key -> position of its entry in heap
+        self.position = {}
+        self.count = 0
+
+    def push(self, node):
+        i = self.position.get(node.key)
+        if i is not None:
+            if self.heap[i][0] <= node.path_risk: return False
+            self.heap[i] = [node.path_risk, self.count, node]
+        else:
+            i = len(self.heap)
+            self.heap.append([node.path_risk, self.count, node])
+        self.count += 1
+        self.sift_up(i)
+        return True
+
+    def pop(self):
+        if len(self.heap) == 0: return None
+        top = self.heap[0]
+        last = self.heap.pop()
+        del self.position[top[2].key]
+        if len(self.heap) > 0:
+            self.heap[0] = last
+            self.sift_down(0)
+        return top[2]
+
+    def sift_up(self, i):
+        heap = self.heap
+        entry = heap[i]
+        key = (entry[0], entry[1])
+        while i > 0:
+            parent = (i - 1) // self.d
+            if (heap[parent][0], heap[parent][1]) <= key: break
+            heap[i] = heap[parent]
+            self.position[heap[i][2].key] = i
+            i = parent
+        heap[i] = entry
+        self.position[entry[2].key] = i
+
+    def sift_down(self, i):
+        heap = self.heap
+        size = len(heap)
+        entry = heap[i]
+        key = (entry[0], entry[1])
+        while True:
+            first = self.d * i + 1
+            if first >= size: break
+            smallest = min(range(first, min(first + self.d, size)), key=lambda c: (heap[c][0], heap[c][1]))
+            if (heap[smallest][0], heap[smallest][1]) >= key: break
+            heap[i] = heap[smallest]
+            self.position[heap[i][2].key] = i
+            i = smallest
+        heap[i] = entry
+        self.position[entry[2].key] = i
+
+    def __len__(self):
+        return len(self.heap)
+
+    def is_not_empty(self):
+        return len(self.heap) > 0
+
+    def states(self):
+        return list(self.position.keys())
+
+# -- Search budgets and cancellation --
+
+# Status of a finished search (see SearchResult)
+PROVED = "proved"
+EXHAUSTED = "exhausted"
+NODE_LIMIT = "node_limit"
+TIME_LIMIT = "time_limit"
+MEMORY_LIMIT = "memory_limit"
+CANCELLED = "cancelled"
+
+# Memory use is only checked every MEMORY_CHECK_INTERVAL nodes
+MEMORY_CHECK_INTERVAL = 1024
+
+# Resident memory of this process in bytes (None where unsupported). Where
+# /proc is not available this is the peak resident memory instead, which
+# never goes down.
+def resident_memory():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+# A flag that can be set from another thread to stop a search. Pass a
+# multiprocessing Event (or anything with set() and is_set()) as event to
+# cancel a search running in another process.
+class CancellationToken(object):
+    def __init__(self, event=None):
+        self.event = event if event is not None else threading.Event()
+    def cancel(self):
+        self.event.set()
+    def is_cancelled(self):
+        return self.event.is_set()
+
+# Limits on a single search. A limit left as None is not enforced.
+#   max_nodes:   number of nodes expanded
+#   max_seconds: wall-clock time since the search started
+#   max_memory:  growth of the process's resident memory since the search
+#                started, in bytes (so long-lived workers are not limited by
+#                memory they held before the search)
+#   cancel:      a CancellationToken checked before each expansion
+class SearchBudget(object):
+    def __init__(self, max_nodes=None, max_seconds=None, max_memory=None, cancel=None):
+        self.max_nodes = max_nodes
+        self.max_seconds = max_seconds
+        self.max_memory = max_memory
+        self.cancel = cancel
+        self.start = None
+        self.start_memory = None
+    def begin(self):
+        self.start = time.perf_counter()
+        if self.max_memory is not None: self.start_memory = resident_memory()
+    def elapsed(self):
+        return time.perf_counter() - self.start
+    # Returns the status that should stop the search, or None to continue
+    def check(self, node_count):
+        if self.cancel is not None and self.cancel.is_cancelled(): return CANCELLED
+        if self.max_nodes is not None and node_count >= self.max_nodes: return NODE_LIMIT
+        if self.max_seconds is not None and self.elapsed() >= self.max_seconds: return TIME_LIMIT
+        if self.max_memory is not None and node_count % MEMORY_CHECK_INTERVAL == 0:
+            memory = resident_memory()
+            if memory is not None and self.start_memory is not None and memory - self.start_memory >= self.max_memory:
+                return MEMORY_LIMIT
+        return None
+
+# Result of a search. Unpacks (and compares) as the (plan, node_count) tuple
+# the searches have always returned, with the outcome and partial stats
+# as attributes:
+#   status:        one of PROVED, EXHAUSTED, NODE_LIMIT, TIME_LIMIT,
+#                  MEMORY_LIMIT or CANCELLED
+#   elapsed:       seconds spent searching
+#   frontier_size: nodes left on the frontier when the search stopped
+#   max_depth:     deepest node expanded
+#   first_solution_time: seconds until the first proof was found (None if
+#                  no proof was found); set by the search modes below
+#   profile:       the SearchProfiler report if the search was profiled
+#                  (see instrumentation.py), otherwise None
+class SearchResult(tuple):
+    def __new__(cls, plan, node_count, status, elapsed=0.0, frontier_size=0, max_depth=0, profile=None,
+                first_solution_time=None):
+        result = tuple.__new__(cls, (plan, node_count))
+        result.status = status
+        result.elapsed = elapsed
+        result.frontier_size = frontier_size
+        result.max_depth = max_depth
+        result.profile = profile
+        result.first_solution_time = first_solution_time
+        return result
+    @property
+    def plan(self):
+        return self[0]
+    @property
+    def node_count(self):
+        return self[1]
+    # True if the search ran to completion (whether or not it found a proof)
+    @property
+    def finished(self):
+        return self.status in (PROVED, EXHAUSTED)
+    def stats(self):
+        return {"status": self.status, "node_count": self.node_count, "elapsed": self.elapsed,
+                "frontier_size": self.frontier_size, "max_depth": self.max_depth}
+
+# Clause bitsets (see solver_helpers.ClauseLog) of the explored states,
+# indexed by clause: holders[i] has bit k set if the k-th explored state
+# holds the clause with id i, and by_count[n] has bit k set if it holds n
+# clauses. The explored states holding every clause of a state are the AND
+# of the holders of its clauses, so a dominance check costs one AND per
+# clause of the state rather than a scan of the explored states.
+class ExploredBitsets(object):
+    def __init__(self):
+        self.holders = []
+        self.by_count = {}
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, bits):
+        state = 1 << self.size
+        self.size += 1
+        count = bits.bit_count()
+        self.by_count[count] = self.by_count.get(count, 0) | state
+        while bits:
+            low = bits & -bits
+            i = low.bit_length() - 1
+            while len(self.holders) <= i: self.holders.append(0)
+            self.holders[i] |= state
+            bits ^= low
+
+    # True if bits is a proper subset of an explored state's bitset (a
+    # superset with the same number of clauses is the same state)
+    def dominates(self, bits) -> bool:
+        candidates = (1 << self.size) - 1
+        candidates &= ~self.by_count.get(bits.bit_count(), 0)
+        while bits and candidates:
+            low = bits & -bits
+            i = low.bit_length() - 1
+            if i >= len(self.holders): return False
+            candidates &= self.holders[i]
+            bits ^= low
+        return candidates != 0
+
+# Combine two action filters (either may be None)
+def chain_filters(first, second):
+    if first is None: return second
+    if second is None: return first
+    return lambda state, actions: second(state, first(state, actions))
+
+# If prune is True, actions that cannot be useful are dropped before children
+# are created (see goal_regression.pruning_filter)
+#
+# If budget (a SearchBudget) is given, the search stops early once a limit
+# is reached or the search is cancelled. If profiler (an
+# instrumentation.SearchProfiler) is given, the search is profiled and its
+# report is the profile of the result.
+#
+# If dominance is True, a child is skipped when its clauses are a proper
+# subset of an explored state's, as the explored state can derive at least
+# as much. BFS explores states in order of their number of clauses, so this
+# only prunes in A* Search, which may then return a longer proof (the
+# explored state may have been reached by a longer path).
+#
+# Returns a SearchResult.
+def queue_search(frontier, problem, prune=False, budget=None, profiler=None, dominance=False):
+    if prune:
+        (args, claim, hist) = sh.unpack(problem.initial_state)
+        action_filter = problem.action_filter
+        problem.action_filter = chain_filters(action_filter, gr.pruning_filter(args, claim))
+        try:
+            return queue_search(frontier, problem, budget=budget, profiler=profiler, dominance=dominance)
+        finally:
+            problem.action_filter = action_filter
+    if profiler is not None: return profiled_search(frontier, problem, budget, profiler, dominance)
+    return search_loop(frontier, problem, budget, dominance=dominance)
+
+# The main loop of queue_search()
+def search_loop(frontier, problem, budget=None, profiler=None, dominance=False):
+    if budget is None: budget = SearchBudget()
+    budget.begin()
+    status = EXHAUSTED
     node_count = 0
+    max_depth = 0
+    duplicates = 0
     explored = set()
+    explored_bits = ExploredBitsets() if dominance else None
     root = problem.root_node()
     frontier.push(root)
     while frontier.is_not_empty():
+        stop = budget.check(node_count)
+        if stop is not None:
+            status = stop
+            break
+        if profiler is not None: profiler.begin("frontier_pop")
+        node = frontier.pop()
+        if profiler is not None: profiler.end()
+        if node is None: break
+        node_count += 1
+        max_depth = max(max_depth, node.depth)
+        if node.is_goal():
+            status = PROVED
+            break
+        explored.add(node.key)
+        if dominance: explored_bits.add(node.state.bits)
+        if profiler is not None: profiler.begin("expand")
+        children = node.children()
+        if profiler is not None:
+            profiler.end()
+            profiler.begin("frontier_push")
+        for child in children:
+            if child.key in explored or (dominance and explored_bits.dominates(child.state.bits)):
+                duplicates += 1
+            elif not frontier.push(child): duplicates += 1
+        if profiler is not None: profiler.end()
+    plan = node.path() if status == PROVED else []
+
+    result = SearchResult(plan, node_count, status, budget.elapsed(), len(frontier), max_depth)
+    if profiler is not None:
+        profiler.count("nodes_expanded", node_count)
+        profiler.count("duplicates_rejected", duplicates)
+        profiler.count("stale_entries_popped", getattr(frontier, "stale_popped", 0))
+        profiler.count("frontier_size", len(frontier))
+    return result
+
+# Run queue_search() with profiler attached to problem and its heuristics,
+# returning the SearchResult with the profiler's report as its profile
+def profiled_search(frontier, problem, budget, profiler, dominance=False):
+    (heuristic, batch_heuristic) = (problem.heuristic, problem.batch_heuristic)
+    problem.profiler = profiler
+    problem.heuristic = profiler.wrap(heuristic, "heuristic", "heuristic_calls")
+    if batch_heuristic is not None:
+        problem.batch_heuristic = profiler.wrap(batch_heuristic, "heuristic", "batch_heuristic_calls")
+    profiler.begin("search")
+    try:
+        result = search_loop(frontier, problem, budget, profiler, dominance)
+    finally:
+        profiler.end()
+        problem.profiler = None
+        (problem.heuristic, problem.batch_heuristic) = (heuristic, batch_heuristic)
+    generated = sum(generated for (expanded, generated) in profiler.depths.values())
+    profiler.count("nodes_generated", generated)
+    result.profile = profiler.report()
+    return result
+
+def breadth_first_search(problem, prune=False, budget=None, profiler=None, dominance=False):
+    problem.batch_heuristic = None
+    return queue_search(FIFOFrontier(), problem, prune, budget, profiler, dominance)
+
+# frontier may be any frontier that orders nodes by path_risk, such as an
+# IndexedHeapFrontier (a PriorityHeapFIFOFrontier by default)
+def a_star_search(problem, heuristic, batch_heuristic=None, prune=False, budget=None, profiler=None, frontier=None,
+                  dominance=False):
+    problem.heuristic = heuristic
+    problem.batch_heuristic = batch_heuristic
+    if frontier is None: frontier = PriorityHeapFIFOFrontier()
+    return queue_search(frontier, problem, prune, budget, profiler, dominance)
+
+# -- Search modes that trade proof length for speed --
+#
+# Each returns a SearchResult (see queue_search() for budget) with
+# first_solution_time set.
+
+# Multiply a heuristic (and its batched version) by weight
+def weighted_heuristics(heuristic, batch_heuristic, weight):
+    weighted = lambda state: weight * heuristic(state)
+    if batch_heuristic is None: return weighted, None
+    return weighted, lambda states: [weight * h for h in batch_heuristic(states)]
+
+# A* Search with the heuristic scaled by weight (>= 1). Larger weights find
+# a proof sooner, but it may be up to weight times longer than the shortest.
+def weighted_a_star_search(problem, heuristic, weight, batch_heuristic=None, budget=None):
+    start = time.perf_counter()
+    (weighted, weighted_batch) = weighted_heuristics(heuristic, batch_heuristic, weight)
+    saved = (problem.heuristic, problem.batch_heuristic)
+    try:
+        result = a_star_search(problem, weighted, weighted_batch, budget=budget)
+    finally:
+        (problem.heuristic, problem.batch_heuristic) = saved
+    if result.status == PROVED: result.first_solution_time = time.perf_counter() - start
+    return result
+
+# Anytime weighted A* Search. Finds a first proof with weighted A*, then
+# keeps searching for shorter proofs (pruning nodes whose unweighted
+# path_cost + heuristic cannot beat the best proof) until the frontier is
+# empty or time_budget seconds have passed since the first proof. The
+# search for the first proof is not limited by time_budget, so a provable
+# claim always returns a proof unless budget (a SearchBudget, which limits
+# the whole search) stops it first. Returns the best proof found, with
+# status PROVED whenever there is one.
+def anytime_a_star_search(problem, heuristic, weight=2.0, time_budget=1.0, batch_heuristic=None, budget=None):
+    saved = (problem.heuristic, problem.batch_heuristic)
+    (problem.heuristic, problem.batch_heuristic) = weighted_heuristics(heuristic, batch_heuristic, weight)
+    try:
+        return anytime_search_loop(problem, weight, time_budget, budget)
+    finally:
+        (problem.heuristic, problem.batch_heuristic) = saved
+
+# The main loop of anytime_a_star_search()
+def anytime_search_loop(problem, weight, time_budget, budget=None):
+    if budget is None: budget = SearchBudget()
+    budget.begin()
+    start = time.perf_counter()
+    status = EXHAUSTED
+    best = None
+    first_solution_time = None
+    node_count = 0
+    max_depth = 0
+    best_cost = {}
+    frontier = PriorityHeapFIFOFrontier()
+    frontier.push(problem.root_node())
+    while frontier.is_not_empty():
+        if best is not None and time.perf_counter() - start - first_solution_time >= time_budget: break
+        stop = budget.check(node_count)
+        if stop is not None:
+            status = stop
+            break
         node = frontier.pop()
+        if node is None: break
+        # Unweighted estimate of the cost of a proof through node
+        estimate = node.path_cost + (node.path_risk - node.path_cost) / weight
+        if best is not None and estimate >= best.path_cost: continue
         node_count += 1
-        if node.is_goal(): break
-        explored.add(node.state)
+        max_depth = max(max_depth, node.depth)
+        if node.is_goal():
+            if first_solution_time is None: first_solution_time = time.perf_counter() - start
+            best = node
+            continue
+        best_cost[node.key] = node.path_cost
         for child in node.children():
-            if child.state in explored: continue
+            if child.key in best_cost and best_cost[child.key] <= child.path_cost: continue
+            if best is not None and child.path_cost >= best.path_cost: continue
             frontier.push(child)
-    plan = node.path() if node.is_goal() else []
+    if best is None: return SearchResult([], node_count, status, budget.elapsed(), len(frontier), max_depth)
+    return SearchResult(best.path(), node_count, PROVED, budget.elapsed(), len(frontier), max_depth,
+                        first_solution_time=first_solution_time)
 
-    return plan, node_count
+# Beam search. Expands the search one depth at a time, keeping only the
+# width children that come first in PriorityHeapFIFOFrontier order. Fast,
+# but may miss proofs (or shorter proofs) that fall outside the beam, so
+# EXHAUSTED only means the beam ran out of nodes. If budget (a SearchBudget)
+# stops the search, no proof is returned.
+def beam_search(problem, heuristic, width, batch_heuristic=None, budget=None):
+    saved = (problem.heuristic, problem.batch_heuristic)
+    (problem.heuristic, problem.batch_heuristic) = (heuristic, batch_heuristic)
+    try:
+        return beam_search_loop(problem, width, budget)
+    finally:
+        (problem.heuristic, problem.batch_heuristic) = saved
 
-def breadth_first_search(problem):
-    return queue_search(FIFOFrontier(), problem)
+# The main loop of beam_search()
+def beam_search_loop(problem, width, budget=None):
+    if budget is None: budget = SearchBudget()
+    budget.begin()
+    start = time.perf_counter()
+    node_count = 0
+    max_depth = 0
+    seen = set()
+    beam = [problem.root_node()]
+    while len(beam) > 0:
+        frontier = PriorityHeapFIFOFrontier()
+        for (i, node) in enumerate(beam):
+            stop = budget.check(node_count)
+            if stop is not None:
+                return SearchResult([], node_count, stop, budget.elapsed(), len(frontier) + len(beam) - i, max_depth)
+            node_count += 1
+            max_depth = max(max_depth, node.depth)
+            if node.is_goal():
+                return SearchResult(node.path(), node_count, PROVED, budget.elapsed(), len(frontier), max_depth,
+                                    first_solution_time=time.perf_counter() - start)
+            seen.add(node.key)
+            for child in node.children():
+                if child.key not in seen: frontier.push(child)
+        beam = []
+        while len(beam) < width and frontier.is_not_empty():
+            node = frontier.pop()
+            if node is not None: beam.append(node)
+    return SearchResult([], node_count, EXHAUSTED, budget.elapsed(), 0, max_depth)
 
-def a_star_search(problem, heuristic):
-    problem.heuristic = heuristic
-    return queue_search(PriorityHeapFIFOFrontier(), problem)
\ No newline at end of file
+# Iterative-deepening A* Search. Each iteration is a depth-first search that
+# does not expand nodes whose path_risk exceeds the bound; the next bound is
+# the smallest path_risk that exceeded it. Memory is limited to the current
+# path and its siblings. Children are generated without rule indexes; a
+# node builds its index from its parent's only when the search visits it.
+#
+# If table_size is given, a transposition table keeps the lowest path_cost
+# each state was reached at during the iteration (for at most table_size
+# states, evicting the least recently used) and skips nodes that reach a
+# state at no lower cost.
+#
+# Returns a SearchResult (see queue_search() for budget).
+def iterative_deepening_a_star(problem, heuristic, batch_heuristic=None, table_size=None, budget=None):
+    saved = (problem.heuristic, problem.batch_heuristic)
+    (problem.heuristic, problem.batch_heuristic) = (heuristic, batch_heuristic)
+    try:
+        return iterative_deepening_loop(problem, table_size, budget)
+    finally:
+        (problem.heuristic, problem.batch_heuristic) = saved
+
+# The main loop of iterative_deepening_a_star()
+def iterative_deepening_loop(problem, table_size, budget=None):
+    if budget is None: budget = SearchBudget()
+    budget.begin()
+    node_count = 0
+    root = problem.root_node()
+    bound = root.path_risk
+    while True:
+        (goal, node_count, next_bound, stop) = bounded_depth_first_search(root, bound, table_size, node_count, budget)
+        if goal is not None:
+            return SearchResult(goal.path(), node_count, PROVED, budget.elapsed(), max_depth=goal.depth)
+        if stop is not None: return SearchResult([], node_count, stop, budget.elapsed())
+        if next_bound is None: return SearchResult([], node_count, EXHAUSTED, budget.elapsed())
+        bound = next_bound
+
+# One iteration of iterative_deepening_a_star(). Returns the goal node (or
+# None), the updated node count, the next bound (None if no node exceeded
+# the bound) and the status that stopped the iteration early (None if it
+# ran to completion).
+def bounded_depth_first_search(root, bound, table_size, node_count, budget=None):
+    table = OrderedDict()
+    next_bound = None
+    on_path = set()
+    stack = [(root, None)]
+    while len(stack) > 0:
+        (node, children) = stack[-1]
+        if children is None:
+            # First visit to node
+            if node.path_risk > bound:
+                if next_bound is None or node.path_risk < next_bound: next_bound = node.path_risk
+                stack.pop()
+                continue
+            if node.key in on_path:
+                stack.pop()
+                continue
+            if table_size is not None:
+                if node.key in table and table[node.key] <= node.path_cost:
+                    stack.pop()
+                    continue
+                table[node.key] = node.path_cost
+                table.move_to_end(node.key)
+                while len(table) > table_size: table.popitem(last=False)
+            if budget is not None:
+                stop = budget.check(node_count)
+                if stop is not None: return None, node_count, next_bound, stop
+            node_count += 1
+            if node.is_goal(): return node, node_count, next_bound, None
+            on_path.add(node.key)
+            children = iter(node.children())
+            stack[-1] = (node, children)
+        child = next(children, None)
+        if child is None:
+            on_path.discard(node.key)
+            stack.pop()
+        else:
+            stack.append((child, None))
+    return None, node_count, next_bound, None
+
+# BFS (or A* Search if a heuristic is given) that only applies actions whose
+# conclusion can contribute to proving the claim (see goal_regression.py)
+def goal_directed_search(problem, heuristic=None, batch_heuristic=None, prune=False, budget=None, profiler=None):
+    (args, claim, hist) = sh.unpack(problem.initial_state)
+    problem.action_filter = gr.relevance_filter(args, claim)
+    try:
+        if heuristic is None: return breadth_first_search(problem, prune, budget, profiler)
+        return a_star_search(problem, heuristic, batch_heuristic, prune, budget, profiler)
+    finally:
+        problem.action_filter = None
@@ -3,10 +3,69 @@ import solver_helpers as sh
 # This file will contain helper functions for finding which inference rules
 # are applicable in a given state.
 
+# Maximum number of compiled formulas kept in the intern table. When the
+# table is full the oldest entry is dropped to make room.
+FORMULA_TABLE_SIZE = 10000
+
+# Compiled form of a single expression string. Formulas are interned in
+# _formula_table, so each distinct string is parsed exactly once and every
+# clause containing the same subterm shares the same child Formula.
+class Formula(object):
+    __slots__ = ("text", "simplified", "a", "b", "unwrapped", "hash", "_left", "_right")
+
+    def __init__(self, text: str):
+        (simplified, a, b) = _parse(text)
+        self.text = text
+        self.simplified = simplified
+        self.a = a
+        self.b = b
+        self.unwrapped = _unwrap(text)
+        self.hash = hash(text)
+        self._left = None
+        self._right = None
+
+    def __hash__(self):
+        return self.hash
+
+    def __eq__(self, other):
+        if isinstance(other, Formula): return self is other or self.text == other.text
+        return NotImplemented
+
+    def __repr__(self):
+        return "Formula(" + repr(self.text) + ")"
+
+    # Compiled 'a' term (with outer parenthesis removed)
+    def left(self):
+        if self._left is None: self._left = compile_expression(unwrapped(self.a))
+        return self._left
+
+    # Compiled 'b' term (with outer parenthesis removed)
+    def right(self):
+        if self._right is None: self._right = compile_expression(unwrapped(self.b))
+        return self._right
+
+_formula_table = {}
+
+# Return the interned Formula for the given expression
+def compile_expression(exp) -> Formula:
+    if isinstance(exp, Formula): return exp
+    formula = _formula_table.get(exp)
+    if formula is None:
+        while len(_formula_table) >= FORMULA_TABLE_SIZE:
+            del _formula_table[next(iter(_formula_table))]
+        formula = Formula(exp)
+        _formula_table[exp] = formula
+    return formula
+
 # Parse into tuple containing
 #   1. The simplified expression
 #   2. The original terms in the expression
-def parse_expression(exp: str) -> tuple: 
+def parse_expression(exp) -> tuple:
+    formula = compile_expression(exp)
+    return (formula.simplified, formula.a, formula.b)
+
+# Uncached parser used when compiling a Formula
+def _parse(exp: str) -> tuple: 
     # 'a' 
     astart = 0
     aend = 1
@@ -59,24 +118,32 @@ def parse_expression(exp: str) -> tuple:
 # Find the closing parenthesis for the open parenthesis at the given index
 # with the string exp
 def find_end_paren(exp: str, index: int) -> int:
-    substr = exp[index:]
     count = 1
-    i = 1
+    i = index + 1
     while count > 0:
-        s = substr[i:i+1]
+        s = exp[i:i+1]
         if s == '(':
             count += 1
         elif s == ')':
             count -=1
         i += 1
-    return i+index
+    return i
 
 # Reconstruct complex expression
-def convert_to_complex(expr: str, a: str, b:str) -> str:
+def convert_to_complex(expr: str, a, b) -> str:
+    if isinstance(a, Formula): a = a.text
+    if isinstance(b, Formula): b = b.text
     new_expr = expr.replace("a", a)
     new_expr = new_expr.replace("b", b)
     return new_expr
 
+# Parenthesize a compound term (one with a binary operator) so that it keeps
+# its meaning inside a larger formula, e.g. ~(p & q) rather than ~p & q
+def grouped(term) -> str:
+    formula = compile_expression(term)
+    if formula.b == "": return formula.text
+    return "(" + formula.text + ")"
+
 #--------------------------------------------------------------
 
 # Dictionary of currently implemented inference rules
@@ -92,14 +159,15 @@ rule_dict = [("Modus Ponens", ["a", "a -> b"], "b"),
 # Find applicable rules from the rule dictionary
 def applicable_rules(state: tuple) -> list:
     (args, claim, hist) = sh.unpack(state)
+    # Parse each arg once (rather than once per rule)
+    parsed = [parse_expression(arg) for arg in args]
     can_apply = []
     for rules in rule_dict:
         cond_index = [] # a list to contain all args that match the rule
         (name, rule_args, cond) = rules
         i = 0
         b = ""
-        for arg in args:
-            (simp, a, b) = parse_expression(arg)
+        for (simp, a, b) in parsed:
             if simp in rule_args:
                 rule_idx = rule_args.index(simp)
                 # Form is:
@@ -120,6 +188,204 @@ def applicable_rules(state: tuple) -> list:
         can_apply.extend(arg_pairings)
     return can_apply
 
+# Positions of the rules in rule_dict (used by RuleIndex)
+MP, MT, SIMP_A, SIMP_B, CONJ, DS_B, DS_A, HS = range(len(rule_dict))
+
+# Incremental version of applicable_rules(). A RuleIndex holds the matches
+# for a sequence of args along with lookup tables of the args by the terms
+# the rules pair on:
+#
+# - implications keyed by antecedent and by consequent
+# - disjunctions keyed by each disjunct
+# - negations keyed by body
+#
+# Adding a clause with extend() returns a new RuleIndex (the original is left
+# unchanged) that only computes the matches involving the new clause. Each
+# index keeps just its own matches and a link to the index it extends, so
+# extending never copies the matches found so far; actions() collects them
+# along the chain and sorts them into applicable_rules() order.
+#
+# An index built with RuleIndex(mutable=True) is instead updated in place by
+# add(), for callers that never need the earlier versions (saturation.py).
+#
+# applicable_rules() treats repeated conjunctions, disjunctions and negations
+# specially, so once one of those is repeated the index is marked inexact and
+# actions() falls back to a full scan of the state.
+class RuleIndex(object):
+    __slots__ = ("size", "exact", "mutable", "atoms", "atom_by_text", "imp_by_ante", "imp_by_cons",
+                 "neg_by_body", "disj_by_left", "disj_by_right", "disj_parts", "conj_parts",
+                 "previous", "added", "removed")
+
+    def __init__(self, mutable=False):
+        self.size = 0
+        self.exact = True
+        self.mutable = mutable
+        self.atoms = [] if mutable else ()
+        self.atom_by_text = {}
+        self.imp_by_ante = {}
+        self.imp_by_cons = {}
+        self.neg_by_body = {}
+        self.disj_by_left = {}
+        self.disj_by_right = {}
+        self.disj_parts = set() if mutable else frozenset()
+        self.conj_parts = set() if mutable else frozenset()
+        # The index this one extends, the (rule, key, action) matches the
+        # last clause added (every match, for a mutable index), and the
+        # (rule, key) matches it invalidated
+        self.previous = None
+        self.added = [] if mutable else ()
+        self.removed = frozenset()
+
+    # Return the list of applicable actions (in applicable_rules() order)
+    def actions(self, state: tuple) -> list:
+        if not self.exact: return applicable_rules(state)
+        found = []
+        removed = set()
+        index = self
+        while index is not None:
+            if len(removed) > 0:
+                found.extend(m for m in index.added if (m[0], m[1]) not in removed)
+            else:
+                found.extend(index.added)
+            removed |= index.removed
+            index = index.previous
+        found.sort(key=lambda m: (m[0], m[1]))
+        return [action for (r, key, action) in found]
+
+    # Return a new index with the given clause appended to the args
+    def extend(self, clause):
+        return self.extend_with_actions(clause)[0]
+
+    # Return a new index with the given clause appended to the args, and the
+    # list of actions the clause adds (the matches that involve it)
+    def extend_with_actions(self, clause) -> tuple:
+        if self.mutable: raise ValueError("A mutable RuleIndex is extended with add()")
+        new = RuleIndex.__new__(RuleIndex)
+        for slot in RuleIndex.__slots__: setattr(new, slot, getattr(self, slot))
+        new.previous = self
+        (added, removed) = new.insert(clause)
+        new.added = tuple(added)
+        new.removed = frozenset(removed)
+        return new, [action for (r, key, action) in added]
+
+    # Append the given clause to the args of a mutable index, returning the
+    # list of actions the clause adds
+    def add(self, clause) -> list:
+        if not self.mutable: raise ValueError("A persistent RuleIndex is extended with extend()")
+        (added, removed) = self.insert(clause)
+        if len(removed) > 0:
+            self.added = [m for m in self.added if (m[0], m[1]) not in removed]
+        self.added.extend(added)
+        return [action for (r, key, action) in added]
+
+    # Record clause in the lookup tables, returning the (rule, key, action)
+    # matches it adds and the (rule, key) matches it invalidates. Tables are
+    # copied before they are changed unless the index is mutable.
+    def insert(self, clause) -> tuple:
+        i = self.size
+        self.size = i + 1
+        if not self.exact: return [], set()
+
+        (simp, a, b) = parse_expression(clause)
+        added = [[] for rule in rule_dict]
+        removed = set()
+        if simp == "a":
+            for (j, imp_b) in self.imp_by_ante.get(a, ()):
+                added[MP].append(((j, i), (rule_dict[MP], [(i, 0), (j, 1)], unwrapped(a), unwrapped(imp_b))))
+            for (x, xa) in self.atoms:
+                added[CONJ].append(((x, i), (rule_dict[CONJ], [(x, 0), (i, 0)], wrap(xa), a)))
+            for (y, ya) in self.atoms:
+                added[CONJ].append(((i, y), (rule_dict[CONJ], [(i, 0), (y, 0)], wrap(a), ya)))
+            added[CONJ].append(((i, i), (rule_dict[CONJ], [(i, 0), (i, 0)], wrap(a), a)))
+            if self.mutable: self.atoms.append((i, a))
+            else: self.atoms = self.atoms + ((i, a),)
+            self.put("atom_by_text", a, i)
+        elif simp == "a -> b":
+            for y in self.atom_by_text.get(a, ()):
+                added[MP].append(((i, y), (rule_dict[MP], [(y, 0), (i, 1)], unwrapped(a), unwrapped(b))))
+            if b in self.neg_by_body:
+                y = self.neg_by_body[b]
+                added[MT].append(((i, y), (rule_dict[MT], [(y, 0), (i, 1)], unwrapped(a), unwrapped(b))))
+            for (x, xa) in self.imp_by_cons.get(a, ()):
+                added[HS].append(((x, i), (rule_dict[HS], [(x, 0), (i, 0)], xa, b)))
+            for (y, yb) in self.imp_by_ante.get(b, ()):
+                added[HS].append(((i, y), (rule_dict[HS], [(i, 0), (y, 0)], a, yb)))
+            if a == b:
+                added[HS].append(((i, i), (rule_dict[HS], [(i, 0), (i, 0)], a, b)))
+            self.put("imp_by_ante", a, (i, b))
+            self.put("imp_by_cons", b, (i, a))
+        elif simp == "~a":
+            if a in self.neg_by_body:
+                self.exact = False
+                return [], set()
+            for (x, xa) in self.imp_by_cons.get(a, ()):
+                added[MT].append(((x, i), (rule_dict[MT], [(i, 0), (x, 1)], unwrapped(xa), unwrapped(a))))
+            left = self.disj_by_left.get(a, ())
+            if len(left) == 1:
+                (d, db) = left[0]
+                added[DS_B].append(((i,), (rule_dict[DS_B], [(d, 0), (i, 1)], unwrapped(a), unwrapped(db))))
+            for (d, da) in self.disj_by_right.get(a, ()):
+                added[DS_A].append(((d,), (rule_dict[DS_A], [(d, 0), (i, 1)], unwrapped(da), unwrapped(a))))
+            if not self.mutable: self.neg_by_body = dict(self.neg_by_body)
+            self.neg_by_body[a] = i
+        elif simp == "a | b":
+            if (a, b) in self.disj_parts:
+                self.exact = False
+                return [], set()
+            if b in self.neg_by_body:
+                n = self.neg_by_body[b]
+                added[DS_A].append(((i,), (rule_dict[DS_A], [(i, 0), (n, 1)], unwrapped(a), unwrapped(b))))
+            # Disjunctive syllogism on 'a' only applies while a single
+            # disjunction has 'a' as its left disjunct
+            if a in self.neg_by_body:
+                n = self.neg_by_body[a]
+                left = self.disj_by_left.get(a, ())
+                if len(left) == 0:
+                    added[DS_B].append(((n,), (rule_dict[DS_B], [(i, 0), (n, 1)], unwrapped(a), unwrapped(b))))
+                elif len(left) == 1:
+                    removed.add((DS_B, (n,)))
+            self.put("disj_by_left", a, (i, b))
+            self.put("disj_by_right", b, (i, a))
+            if self.mutable: self.disj_parts.add((a, b))
+            else: self.disj_parts = self.disj_parts | {(a, b)}
+        elif simp == "a & b":
+            if (a, b) in self.conj_parts:
+                self.exact = False
+                return [], set()
+            added[SIMP_A].append(((i,), (rule_dict[SIMP_A], [(i, 0)], unwrapped(a), unwrapped(b))))
+            added[SIMP_B].append(((i,), (rule_dict[SIMP_B], [(i, 0)], unwrapped(a), unwrapped(b))))
+            if self.mutable: self.conj_parts.add((a, b))
+            else: self.conj_parts = self.conj_parts | {(a, b)}
+        return [(r, key, action) for r in range(len(rule_dict)) for (key, action) in added[r]], removed
+
+    # Append value under key in the named lookup table
+    def put(self, table: str, key: str, value):
+        if self.mutable:
+            lookup = getattr(self, table)
+            lookup[key] = lookup.get(key, ()) + (value,)
+        else:
+            setattr(self, table, add_to_index(getattr(self, table), key, value))
+
+# Build the RuleIndex for the args of a state
+def index_state(state: tuple) -> RuleIndex:
+    (args, claim, hist) = sh.unpack(state)
+    index = RuleIndex()
+    for arg in args:
+        index = index.extend(arg)
+    return index
+
+# Copy of a RuleIndex lookup table with value appended under key
+def add_to_index(table: dict, key: str, value) -> dict:
+    new_table = dict(table)
+    new_table[key] = table.get(key, ()) + (value,)
+    return new_table
+
+# Parenthesize a term for use as the left side of a conjunction
+def wrap(a: str) -> str:
+    if len(a) != 1:
+        a = "(" + unwrapped(a) + ")"
+    return a
+
 # A helper method for applicable_rules()
 def find_common_pairings(rules: tuple, cond_index: list) -> list:
     (name, rule_args, cond) = rules
@@ -255,7 +521,11 @@ def take_1_of_2_mapper(lst: list) -> list:
     return rtrn_lst
 
 # Parenthesis parsing helper function
-def unwrapped(exp: str) -> str:
+def unwrapped(exp) -> str:
+    return compile_expression(exp).unwrapped
+
+# Uncached version of unwrapped() used when compiling a Formula
+def _unwrap(exp: str) -> str:
     if exp[0:1] == "(":
         end = find_end_paren(exp, 0)
         if end == len(exp):
@@ -3,7 +3,10 @@ import rule_helpers as rh
 from queue_search import *
 import a_star_heuristic as astar
 import baseline_ai as baseline
+import saturation as sat
+import truth_table as tt
 import sys
+import time
 
 # Helper method to read input from user to set intital state
 def read_arg_input() -> tuple:
@@ -13,7 +16,7 @@ def read_arg_input() -> tuple:
     print("Enter the number corresponding to the AI you would like to use: \n")
     print("      1. Human (You select actions)     2. Baseline AI (Random) \n" +
           "      3. Breadth First Search           4. A* Search            \n" +
-          "      5. A* Search + Neural Network                             \n")
+          "      5. A* Search + Neural Network     6. Forward Chaining     \n")
     method = input()
     print("\n")
     
@@ -48,16 +51,105 @@ def print_padding(size: int) -> str:
     elif size == 2: return ("             ")
     else: return ("              ")
 
+# Methods that can be run without user input (see solve_claim)
+SOLVE_METHODS = {'2': "Baseline AI (Random)", '3': "Breadth First Search",
+                 '4': "A* Search", '5': "A* Search + Neural Network", '6': "Forward Chaining"}
+
+# The trained network used by method 5, loaded once per process
+network = None
+
+def load_network(path: str = "saved_net.pt"):
+    global network
+    if network is None: network = astar.NeuralNetwork(path)
+    return network
+
+# Lines of the proof in state as (line number, clause, justification) tuples,
+# in the form they are printed by the interactive solver
+def format_proof(state) -> list:
+    (args, claim, hist) = sh.unpack(state)
+    start_rule = hist[0][2] if len(hist) > 0 else len(args)
+    lines = []
+    hist_index = 0
+    for i in range(len(args)):
+        rule = "Assumption"
+        if i >= start_rule:
+            rule = str(hist[hist_index][0])
+            rule += " "
+            rule += str(tuple(map(lambda i: i + 1, hist[hist_index][1])))
+            hist_index += 1
+        lines.append((i+1, args[i], rule))
+    return lines
+
+# Helper method to print one line of format_proof()
+def print_proof_line(line: tuple):
+    (number, clause, rule) = line
+    print(str(number) + ". " + clause + print_padding(len(clause) + len(str(number))) + rule +"\n")
+
+# Solve a claim without user input using one of SOLVE_METHODS. Searches stop
+# early if budget (a SearchBudget) runs out. Returns a dict with:
+#   - status: a queue_search status (PROVED, EXHAUSTED, NODE_LIMIT, ...) or
+#     truth_table.NOT_ENTAILED
+#   - plan: the actions applied to the initial state (None for the baseline AI)
+#   - proof: format_proof() of the final state
+#   - node_count: nodes expanded (steps taken by the baseline AI)
+#   - time: seconds spent solving
+#   - cached: True if the result came from cache
+#
+# If cache (a proof_cache.ProofCache) is given, search results are looked up
+# in it (under method) before searching, and finished searches are stored in
+# it.
+#
+# If dominance is True, the A* searches (methods 4 and 5) skip states whose
+# clauses are a proper subset of an explored state's (see
+# queue_search.queue_search()). They expand fewer nodes but may return
+# longer proofs, so their results are cached separately.
+#
+# If precheck is True, claims that the args do not entail (see
+# truth_table.py) are rejected with status NOT_ENTAILED before searching, as
+# they have no valid proof.
+def solve_claim(args: list, claim: str, method: str, budget: SearchBudget = None, cache = None,
+                precheck: bool = True, dominance: bool = False) -> dict:
+    start = time.perf_counter()
+    state = sh.initial_state(args, claim)
+    problem = SearchProblem(state, sh.proof_complete)
+    if precheck and method in SOLVE_METHODS and method != '2' and tt.entails(args, claim) is False:
+        return {"status": tt.NOT_ENTAILED, "plan": [], "proof": format_proof(state),
+                "node_count": 0, "time": time.perf_counter() - start, "cached": False}
+    cache_method = method + "-dominance" if dominance and method in ('4', '5') else method
+    cached = cache.lookup(args, claim, cache_method) if cache is not None and method != '2' else None
+    if cached is not None:
+        (plan, status, node_count) = (cached["plan"], cached["status"], cached["node_count"])
+        final_state = state
+        for action in plan: final_state = sh.apply_rule(action, final_state)
+    elif method == '2':
+        (final_state, success, node_count) = baseline.apply_random_actions(state)
+        plan = None
+        status = PROVED if success else EXHAUSTED
+    else:
+        if method == '3': result = breadth_first_search(problem, budget=budget)
+        elif method == '4': result = a_star_search(problem, astar.simple_heuristic, budget=budget, dominance=dominance)
+        elif method == '5':
+            net = load_network()
+            result = a_star_search(problem, net.nn_heuristic, net.nn_batch_heuristic, budget=budget,
+                                   dominance=dominance)
+        elif method == '6': result = sat.saturation_search(problem, budget)
+        else: raise ValueError("Invalid solving method: %s" % method)
+        (plan, node_count) = result
+        status = result.status
+        final_state = state
+        for action in plan: final_state = sh.apply_rule(action, final_state)
+        if cache is not None and result.finished:
+            cache.store(args, claim, cache_method, plan, status, node_count, result.elapsed)
+    return {"status": status, "plan": plan, "proof": format_proof(final_state),
+            "node_count": node_count, "time": time.perf_counter() - start, "cached": cached is not None}
+
 # Main method when script is executed
 if __name__ == "__main__":
     (args, claim, method) = read_arg_input()
     state = sh.initial_state(args, claim)
-    problem = SearchProblem(state, sh.proof_complete)
 
     if method == '1':
-        for i in range(len(args)):
-            rule = "Assumption"
-            print(str(i+1) + ". " + args[i] + print_padding(len(args[i]) + len(str(i+1))) + rule +"\n")
+        for line in format_proof(state): print_proof_line(line)
         print("\n-----------------------------------------------\n")
         while not sh.proof_complete(state):
             actions = sh.valid_actions(state)
@@ -69,67 +161,21 @@ if __name__ == "__main__":
             act_idx = input("Select rule number to apply:  ")
             state = sh.apply_rule(actions[int(act_idx) - 1], state)
             print("\n-----------------------------------------------\n")
-            (args, claim, hist) = sh.unpack(state)
-            start_rule = hist[0][2]
-            hist_index = 0
-            for i in range(len(args)):
-                rule = "Assumption"
-                if i >= start_rule:
-                    rule = str(hist[hist_index][0])
-                    rule += " "
-                    rule += str(tuple(map(lambda i: i + 1, hist[hist_index][1])))
-                    hist_index += 1
-                print(str(i+1) + ". " + args[i] + print_padding(len(args[i]) + len(str(i+1))) + rule +"\n")
+            for line in format_proof(state): print_proof_line(line)
 
-            
-    elif method == '2':
-        (state, success, steps) = baseline.apply_random_actions(state)
-        # Display final proof
-        (args, claim, hist) = sh.unpack(state)
-        start_rule = hist[0][2]
-        hist_index = 0
-        for i in range(len(args)):
-            rule = "Assumption"
-            if i >= start_rule:
-                input()
-                rule = str(hist[hist_index][0])
-                rule += " "
-                rule += str(tuple(map(lambda i: i + 1, hist[hist_index][1])))
-                hist_index += 1
-            print(str(i+1) + ". " + args[i] + print_padding(len(args[i]) + len(str(i+1))) + rule +"\n")
-
-    else:
-    
-        if method == '3': plan, node_count = breadth_first_search(problem)
-        elif method == '4': plan, node_count = a_star_search(problem, astar.simple_heuristic)
-        elif method == '5':
-            Net = astar.NeuralNetwork()
-            adv = Net.nn_heuristic
-            plan, node_count = a_star_search(problem, adv)
-        else:
-            print("Invalid solving method!\n")
-            sys.exit()
-
-        states = [problem.initial_state]
-        for a in range(len(plan)):
-            states.append(sh.apply_rule(plan[a], states[-1]))
+    elif method in SOLVE_METHODS:
+        result = solve_claim(args, claim, method)
 
         # Display final proof
-        final_state = states[len(states)-1]
-        (args, claim, hist) = sh.unpack(final_state)
-        if len(hist) == 0:
-            if sh.proof_complete(final_state): print("\n------- Claim contained in initial args -------\n")
+        if method != '2' and len(result["plan"]) == 0:
+            if result["status"] == PROVED: print("\n------- Claim contained in initial args -------\n")
             else: print("\n---------------- Cannot Prove ----------------\n")
             sys.exit()
 
-        start_rule = hist[0][2]
-        hist_index = 0
-        for i in range(len(args)):
-            rule = "Assumption"
-            if i >= start_rule:
-                input()
-                rule = str(hist[hist_index][0])
-                rule += " "
-                rule += str(tuple(map(lambda i: i + 1, hist[hist_index][1])))
-                hist_index += 1
-            print(str(i+1) + ". " + args[i] + print_padding(len(args[i]) + len(str(i+1))) + rule +"\n")
\ No newline at end of file
+        for line in result["proof"]:
+            if line[2] != "Assumption": input()
+            print_proof_line(line)
+
+    else:
+        print("Invalid solving method!\n")
+        sys.exit()
@@ -0,0 +1,121 @@
+import time
+import solver_helpers as sh
+import rule_helpers as rh
+import queue_search as qs
+import goal_regression as gr
+
+# This file finds what can be derived from a set of assumptions by forward
+# chaining over rule_dict rather than by searching over states. Clauses are
+# added one round at a time until nothing new can be derived (or the claim
+# is found).
+#
+# Evaluation is semi-naive: each clause is added to a single mutable
+# RuleIndex once, and add() returns only the matches that involve it, so each
+# action is fired exactly once rather than once per round.
+#
+# Conjunction is the only rule whose conclusions are not built from existing
+# clauses, so without a bound the clause set never stops growing. It only
+# fires when its conclusion is a subformula of the claim or the assumptions,
+# or it conjoins a parenthesized clause '(x)' with itself (simplifying that
+# is the only way to remove the parenthesis).
+#
+# Each derived clause keeps the first action that derived it, so a proof can
+# be read back from the claim. Proofs are valid but not always shortest.
+
+# Maximum number of clauses derived by saturate()
+MAX_CLAUSES = 10000
+
+class Saturation(object):
+    def __init__(self, args: list, claim: str):
+        self.args = list(args)
+        self.claim = claim
+        # Clauses in the order they were added (unique assumptions first)
+        self.clauses = []
+        # Clause -> position in clauses
+        self.position = {}
+        # First action that derived each clause (None for an assumption)
+        self.justification = []
+        self.index = rh.RuleIndex(mutable=True)
+        self.rounds = 0
+
+    def __len__(self):
+        return len(self.clauses)
+
+    def provable(self, clause: str = None) -> bool:
+        return (self.claim if clause is None else clause) in self.position
+
+    # Add clause with its justification, returning the actions it adds
+    def add(self, clause: str, action) -> list:
+        self.position[clause] = len(self.clauses)
+        self.clauses.append(clause)
+        self.justification.append(action)
+        return self.index.add(clause)
+
+    # Plan that derives clause from a state built from args (None if the
+    # clause was not derived)
+    def proof(self, clause: str = None) -> list:
+        if clause is None: clause = self.claim
+        if clause not in self.position: return None
+        needed = set()
+        pending = [self.position[clause]]
+        while len(pending) > 0:
+            k = pending.pop()
+            if k in needed or self.justification[k] is None: continue
+            needed.add(k)
+            pending.extend(arg_idx for (arg_idx, rule_idx) in self.justification[k][1])
+        # Map saturation positions to positions in the proof state
+        first = {}
+        for i, arg in enumerate(self.args): first.setdefault(arg, i)
+        new_position = {k: first[self.clauses[k]] for k in range(len(self.clauses)) if self.justification[k] is None}
+        plan = []
+        for k in sorted(needed):
+            (form, indices, a, b) = self.justification[k]
+            plan.append((form, [(new_position[arg_idx], rule_idx) for (arg_idx, rule_idx) in indices], a, b))
+            new_position[k] = len(self.args) + len(plan) - 1
+        return plan
+
+# Saturate args, stopping early once the claim is derived if stop_at_claim.
+# If budget (a queue_search.SearchBudget) is given, it is checked before each
+# clause is added, with the number of clauses added as the node count.
+# Returns the Saturation and its queue_search status (PROVED if the claim was
+# derived, EXHAUSTED if nothing more can be derived, or the budget status).
+def saturate(args: list, claim: str, stop_at_claim: bool = True, budget: qs.SearchBudget = None,
+             max_clauses: int = MAX_CLAUSES) -> tuple:
+    saturation = Saturation(args, claim)
+    bound = set()
+    for clause in list(args) + [claim]:
+        gr.add_subformulas(clause, bound)
+    if budget is not None: budget.begin()
+
+    delta = []
+    for arg in args:
+        if arg not in saturation.position: delta.extend(saturation.add(arg, None))
+    while len(delta) > 0:
+        if stop_at_claim and saturation.provable(): break
+        saturation.rounds += 1
+        next_delta = []
+        for action in delta:
+            clause = sh.conclusion(action)
+            if clause in saturation.position: continue
+            (form, indices, a, b) = action
+            if form[0] == "Conjunction" and clause not in bound:
+                if indices[0] != indices[1] or b[0:1] != "(": continue
+            if len(saturation) >= max_clauses: return saturation, qs.NODE_LIMIT
+            if budget is not None:
+                stop = budget.check(len(saturation))
+                if stop is not None: return saturation, stop
+            next_delta.extend(saturation.add(clause, action))
+            if stop_at_claim and clause == claim: break
+        delta = next_delta
+    return saturation, (qs.PROVED if saturation.provable() else qs.EXHAUSTED)
+
+# Prove the initial state of problem by saturation. Returns a
+# queue_search.SearchResult, with the number of clauses derived as the node
+# count (see queue_search.queue_search() for budget).
+def saturation_search(problem: qs.SearchProblem, budget: qs.SearchBudget = None) -> qs.SearchResult:
+    start = time.perf_counter()
+    (args, claim, hist) = sh.unpack(problem.initial_state)
+    (saturation, status) = saturate(args, claim, budget=budget)
+    plan = saturation.proof() if status == qs.PROVED else []
+    return qs.SearchResult(plan, len(saturation), status, time.perf_counter() - start,
+                           max_depth=saturation.rounds)
@@ -1,3 +1,4 @@
+import numpy as np
 import rule_helpers as rh
 
 # The state of the problem will be represented by a tuple with three elements:
@@ -13,6 +14,9 @@ import rule_helpers as rh
 #           current state. This will be referenced for the final output of
 #           the proof.
 
+# States may also be held as a ClauseLog (see below), which every helper in
+# this file accepts in place of the tuple.
+
 # Create the intial state tuple based on the argument and claim input
 def initial_state(arguments: list, claim: str) -> tuple:
     return pack(arguments, claim, [])
@@ -20,10 +24,20 @@ def initial_state(arguments: list, claim: str) -> tuple:
 
 # Check if the goal state has been reached
 def proof_complete(state: tuple) -> bool:
+    if isinstance(state, ClauseLog): return state.complete
     (args, claim, hist) = unpack(state)
     return claim in args
 
 
+# Canonical key for a state: the set of proven clauses and the claim. The
+# history and the order the clauses were derived in are ignored, so states
+# reached by applying the same rules in a different order share a key.
+def state_key(state: tuple) -> tuple:
+    if isinstance(state, ClauseLog): return state
+    (args, claim, hist) = state
+    return (frozenset(args), claim)
+
+
 # Return list of valid actions in the current state with the following form:
 #
 # - name:   The str name of the rule to be applied; this will be added to
@@ -39,18 +53,30 @@ def valid_actions(state: tuple) -> list:
 
 # Update the state by applying the given rule
 def apply_rule(rule: tuple, state: tuple) -> tuple:
-    (args, claim, hist) = unpack(state)
     (form, indices, a, b) = rule
     (name, pattern, concl) = form
+    if isinstance(state, ClauseLog):
+        entry = (name, tuple(rh.take_1_of_2_mapper(indices)), state.length)
+        return state.append(conclusion(rule), entry)
+    (args, claim, hist) = unpack(state)
 
     # Add to the hist element; tuple contains name of rule, indices that are 
     # referenced, and the index that the new arg will be added at
     # Note: Not storing index in rule in history (as it is sorted)
     hist.append((name, tuple(rh.take_1_of_2_mapper(indices)), len(args)))
-    result = rh.convert_to_complex(concl, a, b)
-    args.append(result)
+    args.append(conclusion(rule))
     return pack(args, claim, hist)
 
+
+# The clause that applying the given rule adds to args. Terms are matched
+# without their parenthesis, so they are grouped again when the conclusion
+# builds a larger formula from them (Modus Tollens, Hypothetical Syllogism).
+def conclusion(rule: tuple) -> str:
+    (form, indices, a, b) = rule
+    (name, pattern, concl) = form
+    if concl != "a" and concl != "b": (a, b) = (rh.grouped(a), rh.grouped(b))
+    return rh.convert_to_complex(concl, a, b)
+
 #-------------------------------------------------------------------------
 
 # Packs the state into a hashable object
@@ -59,5 +85,149 @@ def pack(args, claim, hist):
 
 # Unpacks the state into a mutable object
 def unpack(state):
+    if isinstance(state, ClauseLog): return state.args(), state.claim, state.hist()
     args, claim, hist = state
     return list(args), claim, list(hist)
+
+#-------------------------------------------------------------------------
+
+# Maps each distinct clause of a problem to a small integer id (the order in
+# which clauses were first seen), so that a set of clauses can be held as an
+# integer bitset with bit i set for the clause with id i.
+class ClauseDictionary(object):
+    __slots__ = ("ids", "clauses")
+
+    def __init__(self):
+        self.ids = {}
+        self.clauses = []
+
+    def __len__(self):
+        return len(self.clauses)
+
+    # Id of clause, assigning the next id if it has not been seen
+    def id(self, clause) -> int:
+        i = self.ids.get(clause)
+        if i is None:
+            i = self.ids[clause] = len(self.clauses)
+            self.clauses.append(clause)
+        return i
+
+    # Id of clause, or None if it has not been seen
+    def get(self, clause):
+        return self.ids.get(clause)
+
+# A persistent state. Each ClauseLog holds one clause (and the hist entry
+# that derived it, or None for an assumption) plus a pointer to the log it
+# was appended to, so applying a rule is O(1) and every child shares its
+# parent's clauses rather than copying them.
+#
+# The first log in a chain is empty (its clause is None) and holds the
+# ClauseDictionary shared by every log appended to it. Each log also keeps
+# the bitset of its clauses' ids, so membership, equality and subset checks
+# are integer operations rather than walks of the chain.
+#
+# A ClauseLog is its own state key: its hash is kept up to date as clauses
+# are appended, and two logs are equal when they hold the same set of
+# clauses and the same claim.
+class ClauseLog(object):
+    __slots__ = ("parent", "clause", "entry", "claim", "length", "complete", "hash", "ids", "bits")
+
+    def __init__(self, parent, clause, entry, claim, ids=None):
+        self.parent = parent
+        self.clause = clause
+        self.entry = entry
+        self.claim = claim
+        if parent is None:
+            self.length = 0
+            self.complete = False
+            self.hash = hash(claim)
+            self.ids = ids if ids is not None else ClauseDictionary()
+            self.bits = 0
+        else:
+            self.length = parent.length + 1
+            self.complete = parent.complete or clause == claim
+            self.hash = parent.hash
+            self.ids = parent.ids
+            bit = 1 << self.ids.id(clause)
+            if not parent.bits & bit: self.hash += hash(clause)
+            self.bits = parent.bits | bit
+
+    def __hash__(self):
+        return self.hash
+
+    def __eq__(self, other):
+        if not isinstance(other, ClauseLog): return NotImplemented
+        if self is other: return True
+        if self.hash != other.hash or self.claim != other.claim: return False
+        if self.ids is other.ids: return self.bits == other.bits
+        return set(self.clauses()) == set(other.clauses())
+
+    def append(self, clause, entry=None):
+        return ClauseLog(self, clause, entry, self.claim)
+
+    def contains(self, clause) -> bool:
+        i = self.ids.get(clause)
+        return i is not None and (self.bits >> i) & 1 == 1
+
+    # True if every clause of this log is also in other (other dominates it)
+    def subset_of(self, other) -> bool:
+        if self.ids is other.ids: return self.bits & ~other.bits == 0
+        return set(self.clauses()) <= set(other.clauses())
+
+    # Number of distinct clauses
+    def clause_count(self) -> int:
+        return self.bits.bit_count()
+
+    # The clause bitset as a NumPy bool array indexed by clause id
+    def bool_array(self) -> np.ndarray:
+        return bits_to_array(self.bits, len(self.ids))
+
+    # Clauses from newest to oldest
+    def clauses(self):
+        log = self
+        while log.parent is not None:
+            yield log.clause
+            log = log.parent
+
+    def args(self) -> list:
+        args = list(self.clauses())
+        args.reverse()
+        return args
+
+    def hist(self) -> list:
+        hist = []
+        log = self
+        while log.parent is not None:
+            if log.entry is not None: hist.append(log.entry)
+            log = log.parent
+        hist.reverse()
+        return hist
+
+# Bool array of length size with element i set if bit i of bits is set
+def bits_to_array(bits: int, size: int) -> np.ndarray:
+    data = np.frombuffer(bits.to_bytes((size + 7) // 8, "little"), dtype=np.uint8)
+    return np.unpackbits(data, bitorder="little")[:size].astype(bool)
+
+# Matrix of the clause bitsets of logs sharing one ClauseDictionary (one row
+# per log), for operating on many states at once when the number of distinct
+# clauses is large
+def bits_matrix(logs: list) -> np.ndarray:
+    if len(logs) == 0: return np.zeros((0, 0), dtype=bool)
+    size = len(logs[0].ids)
+    return np.array([bits_to_array(log.bits, size) for log in logs], dtype=bool).reshape(len(logs), size)
+
+# True if clause is one of the args of state
+def contains(state, clause) -> bool:
+    if isinstance(state, ClauseLog): return state.contains(clause)
+    return clause in state[0]
+
+# Convert a state tuple to a ClauseLog
+def persistent_state(state):
+    if isinstance(state, ClauseLog): return state
+    (args, claim, hist) = state
+    hist_start = len(args) - len(hist)
+    log = ClauseLog(None, None, None, claim)
+    for i in range(len(args)):
+        entry = hist[i - hist_start] if i >= hist_start else None
+        log = log.append(args[i], entry)
+    return log
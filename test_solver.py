@@ -4,8 +4,29 @@ import rule_helpers as rh
 import queue_search as qs
 import a_star_heuristic as astar
 import neural_network as nn
+import problem_corpus as pc
+import automated_experiments as ae
+import benchmark_solver as bm
+import goal_regression as gr
+import proof_service as ps
+import batch_solver as bs
+import proof_cache as pcache
+import run_solver as rs
+import lemma_store as ls
+import saturation as sat
+import instrumentation as ins
+import truth_table as tt
 import numpy as np
 import numpy.testing as npt
+import torch as tr
+import tempfile
+import os
+import threading
+import asyncio
+import json
+import io
+import contextlib
+import random
 
 # Notes about test file:
 #
@@ -57,6 +78,52 @@ class HelperTestCase(ut.TestCase):
         self.assertTrue(sh.proof_complete(state))
 
 
+    def test_state_key_ignores_order(self):
+        state1 = sh.pack(["p -> q", "p", "q", "p & q"], "p & q", [("Modus Ponens", (1, 0), 2)])
+        state2 = sh.pack(["p -> q", "p", "p & q", "q"], "p & q", [])
+        self.assertEqual(sh.state_key(state1), sh.state_key(state2))
+        self.assertNotEqual(state1, state2)
+
+    def test_clause_log_matches_tuple(self):
+        state = sh.initial_state(["p -> q", "p"], "q")
+        log = sh.persistent_state(state)
+        action = sh.valid_actions(log)[0]
+        self.assertEqual(sh.valid_actions(log), sh.valid_actions(state))
+        self.assertEqual(sh.unpack(sh.apply_rule(action, log)), sh.unpack(sh.apply_rule(action, state)))
+        self.assertTrue(sh.proof_complete(sh.apply_rule(action, log)))
+        self.assertFalse(sh.proof_complete(log))
+
+    def test_clause_log_key(self):
+        log1 = sh.persistent_state(sh.initial_state(["p", "q"], "r")).append("s").append("t")
+        log2 = sh.persistent_state(sh.initial_state(["p", "q"], "r")).append("t").append("s").append("t")
+        self.assertEqual(log1, log2)
+        self.assertEqual(hash(log1), hash(log2))
+        self.assertNotEqual(log1, log1.parent)
+
+    def test_clause_log_bitset(self):
+        root = sh.persistent_state(sh.initial_state(["p", "q"], "r"))
+        log1 = root.append("s").append("t")
+        log2 = root.append("t").append("s").append("t")
+        self.assertEqual(log1.bits, log2.bits)
+        self.assertEqual(log2.clause_count(), 4)
+        self.assertTrue(log1.contains("s"))
+        self.assertFalse(log1.contains("r"))
+        self.assertFalse(root.contains("s"))
+        self.assertTrue(sh.contains(log1, "p"))
+        self.assertTrue(sh.contains(sh.initial_state(["p"], "q"), "p"))
+        # Dominance
+        self.assertTrue(root.subset_of(log1))
+        self.assertTrue(log1.subset_of(log2))
+        self.assertFalse(log1.subset_of(root))
+        other = sh.persistent_state(sh.initial_state(["q", "p", "s", "t"], "r"))
+        self.assertTrue(log1.subset_of(other))
+        self.assertEqual(log1, other)
+        # NumPy conversion
+        npt.assert_array_equal(log1.bool_array(), [True, True, True, True])
+        npt.assert_array_equal(root.append("t").bool_array(), [True, True, False, True])
+        self.assertEqual(sh.bits_matrix([root, log1]).shape, (2, 4))
+        self.assertEqual(sh.bits_to_array(1 << 100, 101).sum(), 1)
+
 class RuleTestCase(ut.TestCase):
 
     def test_simple_imp_parse(self):
@@ -133,6 +200,70 @@ class RuleTestCase(ut.TestCase):
         self.assertEqual(applic, exp)
 
 
+class FormulaTestCase(ut.TestCase):
+
+    def test_compile_interned(self):
+        f1 = rh.compile_expression("p -> (q -> r)")
+        f2 = rh.compile_expression("p -> (q -> r)")
+        self.assertIs(f1, f2)
+        self.assertIs(f1.right(), rh.compile_expression("q -> r"))
+
+    def test_parse_compiled(self):
+        f = rh.compile_expression("(p * r) | (q -> r)")
+        self.assertEqual(rh.parse_expression(f), ("a | b", "(p * r)", "(q -> r)"))
+        self.assertEqual(rh.unwrapped(f.b), "q -> r")
+        self.assertEqual(rh.convert_to_complex("a & b", f.left(), "s"), "p * r & s")
+
+    def test_table_bounded(self):
+        size = rh.FORMULA_TABLE_SIZE
+        rh.FORMULA_TABLE_SIZE = 4
+        try:
+            for i in range(10):
+                rh.compile_expression("p" + str(i) + " -> q")
+            self.assertLessEqual(len(rh._formula_table), 4)
+        finally:
+            rh.FORMULA_TABLE_SIZE = size
+
+
+class RuleIndexTestCase(ut.TestCase):
+
+    def test_index_matches_applicable_rules(self):
+        args = ["p -> q", "q -> r", "p", "r | s", "~s", "p & t"]
+        state = sh.initial_state(args, "r")
+        index = rh.index_state(state)
+        self.assertTrue(index.exact)
+        self.assertEqual(index.actions(state), rh.applicable_rules(state))
+
+    def test_extend_matches_applicable_rules(self):
+        args = ["p -> q", "q -> r", "p", "r | s"]
+        index = rh.index_state(sh.initial_state(args, "s"))
+        for clause in ["q", "~r", "p -> r", "(r | s) -> t", "r | t"]:
+            args.append(clause)
+            state = sh.initial_state(args, "s")
+            index = index.extend(clause)
+            self.assertEqual(index.actions(state), rh.applicable_rules(state))
+
+    def test_mutable_index_matches_extend(self):
+        args = ["p -> q", "q -> r", "p", "r | s"]
+        index = rh.index_state(sh.initial_state(args, "s"))
+        mutable = rh.RuleIndex(mutable=True)
+        for arg in args: mutable.add(arg)
+        for clause in ["q", "~r", "p -> r", "(r | s) -> t", "r | t"]:
+            args.append(clause)
+            state = sh.initial_state(args, "s")
+            (index, actions) = index.extend_with_actions(clause)
+            self.assertEqual(mutable.add(clause), actions)
+            self.assertEqual(mutable.actions(state), rh.applicable_rules(state))
+        self.assertRaises(ValueError, mutable.extend, "p")
+        self.assertRaises(ValueError, index.add, "p")
+
+    def test_repeated_clause_falls_back(self):
+        state = sh.initial_state(["p & q", "p & q"], "p")
+        index = rh.index_state(state)
+        self.assertFalse(index.exact)
+        self.assertEqual(index.actions(state), rh.applicable_rules(state))
+
+
 class RuleDictTestCase(ut.TestCase):
 
     def test_conjunction_rule(self):
@@ -313,6 +444,834 @@ class QueueSearchTestCase(ut.TestCase):
         self.assertEqual(hist, final_hist)
 
 
+class HeuristicTestCase(ut.TestCase):
+
+    def setUp(self):
+        tr.manual_seed(0)
+        net = tr.nn.Sequential(tr.nn.Flatten(), tr.nn.Linear(16*8*8, 1))
+        handle, self.path = tempfile.mkstemp(suffix=".pt")
+        os.close(handle)
+        tr.save(net, self.path)
+        self.net = astar.NeuralNetwork(self.path)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_batch_matches_single(self):
+        states = [sh.initial_state(["p -> q", "p"], "q"),
+                  sh.initial_state(["p -> q", "p", "q"], "q"),
+                  sh.initial_state(["r | s", "~s"], "r")]
+        batch = self.net.nn_batch_heuristic(states)
+        self.assertEqual(len(batch), 3)
+        for i in range(3):
+            self.assertAlmostEqual(batch[i], self.net.nn_heuristic(states[i]), places=5)
+
+    def test_batched_search(self):
+        calls = []
+        def batch_heuristic(states):
+            calls.append(len(states))
+            return [astar.simple_heuristic(s) for s in states]
+        state = sh.initial_state(["p -> (q -> r)", "p", "q"], "r")
+        problem = qs.SearchProblem(state, sh.proof_complete)
+        plan, node_count = qs.a_star_search(problem, astar.simple_heuristic, batch_heuristic)
+        self.assertEqual(len(plan), 2)
+        self.assertGreater(len(calls), 0)
+        self.assertGreater(max(calls), 1)
+
+    def test_cache_hits_on_reordered_state(self):
+        cache = astar.HeuristicCache(astar.simple_heuristic, maxsize=2)
+        state1 = sh.initial_state(["p -> q", "p"], "q & p")
+        state2 = sh.initial_state(["p", "p -> q"], "q & p")
+        self.assertEqual(cache(state1), astar.simple_heuristic(state1))
+        self.assertEqual(cache.batch([state2, state1]), [1, 1])
+        self.assertEqual(cache.stats()["hits"], 2)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_cache_keys_clause_logs(self):
+        cache = astar.HeuristicCache(astar.simple_heuristic)
+        root = sh.persistent_state(sh.initial_state(["p -> q", "p"], "q & p"))
+        state1 = root.append("q")
+        state2 = root.append("q")
+        self.assertIs(astar.cache_key(state1), state1)
+        cache(state1)
+        cache(state2)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_cache_evicts_least_recent(self):
+        cache = astar.HeuristicCache(astar.simple_heuristic, maxsize=2)
+        states = [sh.initial_state(["p"], claim) for claim in ["q", "r", "s"]]
+        for state in states: cache(state)
+        cache(states[2])
+        cache(states[0])
+        self.assertEqual(cache.stats()["size"], 2)
+        self.assertEqual(cache.misses, 4)
+
+class EncodingTestCase(ut.TestCase):
+
+    def test_encoding_matches_clause_encoding(self):
+        args = ["p -> (q -> s)", "s -> ~r", "p & q", "r | s"]
+        claim = "~(q | t)"
+        expected = []
+        literals = []
+        for clause in args:
+            encoded_clause, literals = nn.clause_encoding(clause, literals)
+            expected.append(encoded_clause)
+        for i in range(15 - len(args)):
+            expected.append([[0]*8 for j in range(8)])
+        encoded_clause, literals = nn.clause_encoding(claim, literals)
+        expected.append(encoded_clause)
+        encoded = nn.one_hot_encoding(sh.initial_state(args, claim))
+        npt.assert_array_equal(encoded.numpy(), np.array(expected, dtype=np.float32))
+
+    def test_batch_encoding(self):
+        states = [sh.initial_state(["p -> q", "p"], "q"),
+                  sh.initial_state(["r | s", "~s"], "r")]
+        encoded = nn.batch_encoding(states)
+        self.assertEqual(tuple(encoded.shape), (2, 16, 8, 8))
+        npt.assert_array_equal(encoded[1].numpy(), nn.one_hot_encoding(states[1]).numpy())
+
+    def test_too_many_literals(self):
+        state = sh.initial_state(["a & b", "c & d", "e & f", "g & h"], "a")
+        with self.assertRaises(ValueError):
+            nn.one_hot_encoding(state)
+
+class ProblemCorpusTestCase(ut.TestCase):
+
+    batches = [("Smallest", ["p -> q", "q -> r", "p", "q"], 10, 5),
+               ("Large", ["p -> q", "r -> (p & q)", "r | s", "~s"], 20, 3)]
+
+    def test_corpus_is_seeded(self):
+        corpus1 = pc.generate_corpus(self.batches, 3)
+        corpus2 = pc.generate_corpus(self.batches[1:], 3)
+        self.assertEqual(corpus1["Large"], corpus2["Large"])
+        self.assertEqual(len(corpus1["Smallest"]), 5)
+        for (args, claim, depth) in corpus1["Smallest"]:
+            problem = qs.SearchProblem(sh.initial_state(args, claim), sh.proof_complete)
+            plan, node_count = qs.breadth_first_search(problem)
+            self.assertEqual(len(plan), depth)
+
+    def test_save_and_load(self):
+        corpus = pc.generate_corpus(self.batches, 4)
+        handle, path = tempfile.mkstemp(suffix=".json.gz")
+        os.close(handle)
+        try:
+            pc.save_corpus(corpus, path)
+            self.assertEqual(pc.load_corpus(path), corpus)
+        finally:
+            os.remove(path)
+
+class ExperimentBatchTestCase(ut.TestCase):
+
+    def setUp(self):
+        tr.manual_seed(0)
+        net = tr.nn.Sequential(tr.nn.Flatten(), tr.nn.Linear(16*8*8, 1))
+        handle, self.path = tempfile.mkstemp(suffix=".pt")
+        os.close(handle)
+        tr.save(net, self.path)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def run_batch(self, workers):
+        args = ["p -> q", "r -> (p & q)", "r | s", "~s"]
+        with contextlib.redirect_stdout(io.StringIO()):
+            return ae.run_batch(args, "Large: ", 10, baseline_depth=20, batch_size=6, seed=5,
+                                workers=workers, net_path=self.path)
+
+    def test_parallel_matches_serial(self):
+        serial = self.run_batch(1)
+        self.assertEqual(len(serial[0]), 6)
+        self.assertEqual(self.run_batch(2), serial)
+
+class BenchmarkTestCase(ut.TestCase):
+
+    # A small, quick workload saved to a temporary file
+    def setUp(self):
+        self.saved = (bm.CLAIM_DEPTHS, bm.PROBLEMS_PER_BATCH, bm.MIN_TIME)
+        (bm.CLAIM_DEPTHS, bm.PROBLEMS_PER_BATCH, bm.MIN_TIME) = ([5], 2, 0.01)
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "workload.json.gz")
+
+    def tearDown(self):
+        (bm.CLAIM_DEPTHS, bm.PROBLEMS_PER_BATCH, bm.MIN_TIME) = self.saved
+        self.directory.cleanup()
+
+    def test_workload_is_saved(self):
+        problems, states = bm.build_workload(self.path)
+        self.assertEqual(len(problems), 10)
+        self.assertTrue(os.path.exists(self.path))
+        # Later runs load the saved problems rather than generating new ones
+        bm.PROBLEMS_PER_BATCH = 1
+        self.assertEqual(bm.build_workload(self.path), (problems, states))
+        # Each problem's initial state followed by every state along its proof
+        self.assertEqual(len(states), len(problems) + sum(depth for (args, claim, depth) in problems))
+        self.assertEqual(sum(sh.proof_complete(state) for state in states), len(problems))
+
+    def test_run_benchmarks(self):
+        results = bm.run_benchmarks(self.path)
+        self.assertEqual([result["name"] for result in results],
+                         ["applicable_rules", "apply_rule", "breadth_first_search", "a_star_search",
+                          "one_hot_encoding", "batch_encoding"])
+        for result in results:
+            self.assertGreaterEqual(result["seconds"], bm.MIN_TIME)
+            self.assertGreater(result["ops_per_sec"], 0)
+            self.assertGreater(result["peak_memory"], 0)
+        self.assertGreater(results[2]["nodes_per_sec"], 0)
+
+    def test_print_results_compares(self):
+        result = {"name": "bfs", "ops_per_sec": 30.0, "nodes_per_sec": 0.0, "peak_memory": 1024}
+        previous = [dict(result, ops_per_sec=20.0)]
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            bm.print_results([result], previous)
+        self.assertIn("(1.50x)", output.getvalue())
+
+class SearchNodeTestCase(ut.TestCase):
+
+    def test_deep_path(self):
+        problem = qs.SearchProblem(sh.initial_state(["p"], "q"), sh.proof_complete)
+        node = problem.root_node()
+        for i in range(5000):
+            node = qs.SearchNode(problem, node.state, node, i, 1, depth=node.depth+1, h=0)
+        self.assertEqual(node.path(), list(range(5000)))
+        self.assertEqual(node.path_cost, 5000)
+
+    def test_children_not_retained(self):
+        problem = qs.SearchProblem(sh.initial_state(["p -> q", "p"], "q"), sh.proof_complete)
+        root = problem.root_node()
+        children = root.children()
+        self.assertFalse(hasattr(root, "__dict__"))
+        self.assertEqual(len(children), 2)
+        self.assertEqual([c.action for c in root.children()], [c.action for c in children])
+
+    def test_index_built_on_expansion(self):
+        problem = qs.SearchProblem(sh.initial_state(["p -> q", "p", "~r"], "q"), sh.proof_complete)
+        root = problem.root_node()
+        children = root.children()
+        self.assertTrue(all(child.index is None for child in children))
+        for child in children:
+            grandchildren = child.children()
+            self.assertIs(child.index.previous, root.index)
+            self.assertEqual([c.action for c in grandchildren], sh.valid_actions(child.state))
+
+    def test_frontier_nodes_hold_no_index(self):
+        args = ["p -> (q -> s)", "s -> ~r", "p & q", "r | s"]
+        problem = qs.SearchProblem(sh.initial_state(args, "~r & s & q & p"), sh.proof_complete)
+        frontier = qs.FIFOFrontier()
+        result = qs.queue_search(frontier, problem, budget=qs.SearchBudget(max_nodes=20))
+        self.assertEqual(result.status, qs.NODE_LIMIT)
+        self.assertGreater(len(frontier), 0)
+        self.assertTrue(all(node.index is None for node in frontier.queue_nodes))
+
+class GoalRegressionTestCase(ut.TestCase):
+
+    def test_relevant_clauses(self):
+        args = ["p -> q", "q -> r", "s -> t", "p", "s"]
+        relevant = gr.relevant_clauses(args, "r")
+        self.assertIn("q", relevant)
+        self.assertIn("p -> r", relevant)
+        self.assertNotIn("t", relevant)
+        self.assertNotIn("p & s", relevant)
+
+    def test_goal_directed_search(self):
+        args = ["p -> q", "s -> r", "p", "s"]
+        claim = "r & q"
+        problem = qs.SearchProblem(sh.initial_state(args, claim), sh.proof_complete)
+        plan_bfs, node_count_bfs = qs.breadth_first_search(problem)
+        plan, node_count = qs.goal_directed_search(problem)
+        self.assertEqual(len(plan), len(plan_bfs))
+        self.assertLess(node_count, node_count_bfs)
+        self.assertIsNone(problem.action_filter)
+        state = problem.initial_state
+        for action in plan: state = sh.apply_rule(action, state)
+        self.assertTrue(sh.proof_complete(state))
+
+    def test_pruning_filter(self):
+        args = ["p -> q", "p", "q"]
+        state = sh.initial_state(args, "q & p")
+        action_filter = gr.pruning_filter(args, "q & p")
+        actions = action_filter(state, sh.valid_actions(state))
+        self.assertEqual([sh.conclusion(action) for action in actions], ["q & p"])
+        log = sh.persistent_state(state)
+        self.assertEqual(action_filter(log, sh.valid_actions(log)), actions)
+
+    def test_pruned_search(self):
+        args = ["p -> q", "s -> r", "p", "s"]
+        claim = "r & q"
+        problem = qs.SearchProblem(sh.initial_state(args, claim), sh.proof_complete)
+        plan_bfs, node_count_bfs = qs.breadth_first_search(problem)
+        plan, node_count = qs.breadth_first_search(problem, prune=True)
+        self.assertEqual(len(plan), len(plan_bfs))
+        self.assertLess(node_count, node_count_bfs)
+        self.assertIsNone(problem.action_filter)
+
+class IterativeDeepeningTestCase(ut.TestCase):
+
+    def check_plan(self, args, claim, table_size=None):
+        problem = qs.SearchProblem(sh.initial_state(args, claim), sh.proof_complete)
+        plan_bfs, node_count_bfs = qs.breadth_first_search(problem)
+        heuristic = problem.heuristic
+        plan, node_count = qs.iterative_deepening_a_star(problem, astar.simple_heuristic, table_size=table_size)
+        self.assertIs(problem.heuristic, heuristic)
+        self.assertIsNone(problem.batch_heuristic)
+        self.assertEqual(len(plan), len(plan_bfs))
+        state = problem.initial_state
+        for action in plan: state = sh.apply_rule(action, state)
+        self.assertTrue(sh.proof_complete(state))
+        return node_count
+
+    def test_ida_star(self):
+        self.check_plan(["p -> (q -> r)", "p", "q"], "r")
+        self.check_plan(["p -> q", "q -> r", "~r"], "~p")
+
+    def test_ida_star_table(self):
+        args = ["p -> q", "s -> r", "p", "s"]
+        without_table = self.check_plan(args, "r & q")
+        with_table = self.check_plan(args, "r & q", table_size=100)
+        self.assertLessEqual(with_table, without_table)
+        self.check_plan(args, "r & q", table_size=2)
+
+    def test_ida_star_claim_in_args(self):
+        problem = qs.SearchProblem(sh.initial_state(["p"], "p"), sh.proof_complete)
+        self.assertEqual(qs.iterative_deepening_a_star(problem, astar.simple_heuristic), ([], 1))
+
+class SearchModeTestCase(ut.TestCase):
+
+    args = ["p -> q", "q -> r", "r -> s", "p", "t"]
+    claim = "s & t"
+
+    def assert_proves(self, plan):
+        state = sh.initial_state(self.args, self.claim)
+        for action in plan: state = sh.apply_rule(action, state)
+        self.assertTrue(sh.proof_complete(state))
+
+    def problem(self):
+        return qs.SearchProblem(sh.initial_state(self.args, self.claim), sh.proof_complete)
+
+    def test_weighted_a_star(self):
+        result = qs.weighted_a_star_search(self.problem(), astar.simple_heuristic, 3)
+        self.assert_proves(result.plan)
+        self.assertEqual(result.status, qs.PROVED)
+        self.assertIsNotNone(result.first_solution_time)
+        plan_a_star, node_count_a_star = qs.a_star_search(self.problem(), astar.simple_heuristic)
+        plan, node_count = qs.weighted_a_star_search(self.problem(), astar.simple_heuristic, 1)
+        self.assertEqual((plan, node_count), (plan_a_star, node_count_a_star))
+
+    def test_anytime_a_star(self):
+        result = qs.anytime_a_star_search(self.problem(), astar.simple_heuristic, 3, 5.0)
+        self.assert_proves(result.plan)
+        self.assertEqual(result.status, qs.PROVED)
+        self.assertIsNotNone(result.first_solution_time)
+        plan_bfs, node_count_bfs = qs.breadth_first_search(self.problem())
+        self.assertEqual(len(result.plan), len(plan_bfs))
+
+    def test_anytime_a_star_finishes_first_proof(self):
+        problem = self.problem()
+        problem.heuristic = astar.simple_heuristic
+        plan, node_count = qs.anytime_a_star_search(problem, astar.simple_heuristic, 3, 0.0)
+        self.assert_proves(plan)
+        self.assertIs(problem.heuristic, astar.simple_heuristic)
+        self.assertIsNone(problem.batch_heuristic)
+
+    def test_beam_search(self):
+        problem = self.problem()
+        result = qs.beam_search(problem, astar.simple_heuristic, 3)
+        self.assert_proves(result.plan)
+        self.assertEqual(result.status, qs.PROVED)
+        self.assertIsNotNone(result.first_solution_time)
+        self.assertIsNot(problem.heuristic, astar.simple_heuristic)
+        self.assertIsNone(problem.batch_heuristic)
+        problem = qs.SearchProblem(sh.initial_state(["p"], "q"), sh.proof_complete)
+        result = qs.beam_search(problem, astar.simple_heuristic, 3)
+        self.assertEqual((result.plan, result.status), ([], qs.EXHAUSTED))
+
+class SearchBudgetTestCase(ut.TestCase):
+
+    # An unprovable claim with a state space too large to search quickly
+    def problem(self):
+        return qs.SearchProblem(sh.initial_state(["p", "q", "r", "t", "u"], "s"), sh.proof_complete)
+
+    def test_finished(self):
+        problem = qs.SearchProblem(sh.initial_state(["p -> q", "p"], "q"), sh.proof_complete)
+        result = qs.breadth_first_search(problem, budget=qs.SearchBudget(max_nodes=100))
+        plan, node_count = result
+        self.assertEqual(result.status, qs.PROVED)
+        self.assertTrue(result.finished)
+        self.assertEqual(len(plan), 1)
+        self.assertEqual(result.plan, plan)
+        result = qs.breadth_first_search(qs.SearchProblem(sh.initial_state(["p"], "q"), sh.proof_complete))
+        self.assertEqual(result.status, qs.EXHAUSTED)
+        self.assertEqual(result, ([], result.node_count))
+
+    def test_node_limit(self):
+        result = qs.a_star_search(self.problem(), astar.simple_heuristic, budget=qs.SearchBudget(max_nodes=50))
+        self.assertEqual(result.status, qs.NODE_LIMIT)
+        self.assertFalse(result.finished)
+        self.assertEqual(result.node_count, 50)
+        self.assertEqual(result.plan, [])
+        self.assertGreater(result.frontier_size, 0)
+        result = qs.iterative_deepening_a_star(self.problem(), astar.simple_heuristic, budget=qs.SearchBudget(max_nodes=50))
+        self.assertEqual((result.status, result.node_count), (qs.NODE_LIMIT, 50))
+
+    def test_time_limit(self):
+        result = qs.breadth_first_search(self.problem(), budget=qs.SearchBudget(max_seconds=0.2))
+        self.assertEqual(result.status, qs.TIME_LIMIT)
+        self.assertLess(result.elapsed, 5.0)
+
+    def test_memory_limit(self):
+        result = qs.breadth_first_search(self.problem(), budget=qs.SearchBudget(max_memory=1))
+        if qs.resident_memory() is not None: self.assertEqual(result.status, qs.MEMORY_LIMIT)
+
+    def test_memory_limit_ignores_earlier_use(self):
+        # The process already holds more than max_memory before the search
+        budget = qs.SearchBudget(max_memory=1024)
+        budget.begin()
+        self.assertIsNone(budget.check(0))
+        problem = qs.SearchProblem(sh.initial_state(["p -> q", "p"], "q"), sh.proof_complete)
+        self.assertEqual(qs.breadth_first_search(problem, budget=budget).status, qs.PROVED)
+
+    def test_search_mode_budgets(self):
+        budget = qs.SearchBudget(max_nodes=50)
+        result = qs.anytime_a_star_search(self.problem(), astar.simple_heuristic, budget=budget)
+        self.assertEqual((result.plan, result.node_count, result.status), ([], 50, qs.NODE_LIMIT))
+        self.assertIsNone(result.first_solution_time)
+        self.assertGreater(result.frontier_size, 0)
+        result = qs.weighted_a_star_search(self.problem(), astar.simple_heuristic, 2, budget=budget)
+        self.assertEqual((result.status, result.first_solution_time), (qs.NODE_LIMIT, None))
+        token = qs.CancellationToken()
+        token.cancel()
+        result = qs.beam_search(self.problem(), astar.simple_heuristic, 3, budget=qs.SearchBudget(cancel=token))
+        self.assertEqual((result.plan, result.node_count, result.status), ([], 0, qs.CANCELLED))
+        self.assertEqual(result.frontier_size, 1)
+
+    def test_cancel(self):
+        token = qs.CancellationToken()
+        token.cancel()
+        result = qs.breadth_first_search(self.problem(), budget=qs.SearchBudget(cancel=token))
+        self.assertEqual((result.status, result.node_count), (qs.CANCELLED, 0))
+        token = qs.CancellationToken()
+        timer = threading.Timer(0.1, token.cancel)
+        timer.start()
+        result = qs.breadth_first_search(self.problem(), budget=qs.SearchBudget(max_seconds=30, cancel=token))
+        timer.join()
+        self.assertEqual(result.status, qs.CANCELLED)
+
+class ProofServiceTestCase(ut.TestCase):
+
+    async def exchange(self, requests, timeout=ps.TIMEOUT):
+        service = ps.ProofService(workers=1, max_pending=2, timeout=timeout)
+        port = await service.start("127.0.0.1", 0)
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            for request in requests: writer.write((request + "\n").encode())
+            await writer.drain()
+            responses = [json.loads(await reader.readline()) for request in requests]
+            writer.close()
+        finally:
+            await service.close()
+        return {response["id"]: response for response in responses}
+
+    def test_requests(self):
+        requests = [json.dumps({"id": 1, "assumptions": ["p -> q", "p"], "claim": "q", "method": "4"}),
+                    json.dumps({"id": 2, "assumptions": ["p"], "claim": "q", "method": "3"}),
+                    json.dumps({"id": 3, "assumptions": ["p"], "claim": "q", "method": "9"}),
+                    "not json"]
+        responses = asyncio.run(self.exchange(requests))
+        self.assertEqual(responses[1]["status"], qs.PROVED)
+        self.assertEqual(responses[1]["proof"], [[1, "p -> q", "Assumption"], [2, "p", "Assumption"],
+                                                 [3, "q", "Modus Ponens (2, 1)"]])
+        self.assertEqual(responses[2]["status"], tt.NOT_ENTAILED)
+        self.assertIn("error", responses[3])
+        self.assertIn("error", responses[None])
+
+    def test_timeout(self):
+        # Entailed, but no rule introduces a disjunction
+        request = json.dumps({"id": 1, "assumptions": ["p", "q", "r", "t", "u"], "claim": "p | s", "method": "3", "timeout": 0.2})
+        responses = asyncio.run(self.exchange([request]))
+        self.assertEqual(responses[1]["status"], qs.TIME_LIMIT)
+
+class BatchSolverTestCase(ut.TestCase):
+
+    lines = ['{"assumptions": ["p -> q", "p"], "claim": "q"}\n',
+             '\n',
+             '{"id": "x", "assumptions": ["p"], "claim": "q", "method": "bfs"}\n',
+             'not json\n']
+
+    def run_lines(self, workers):
+        output = io.StringIO()
+        count = bs.run_batch(self.lines, output, "astar", workers)
+        self.assertEqual(count, 3)
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        return {result["id"]: result for result in results}
+
+    def test_run_batch(self):
+        results = self.run_lines(1)
+        self.assertEqual(results[1]["status"], qs.PROVED)
+        self.assertEqual(results[1]["plan"], [[3, "q", "Modus Ponens (2, 1)"]])
+        self.assertEqual(results["x"]["status"], tt.NOT_ENTAILED)
+        self.assertIn("error", results[4])
+        parallel = self.run_lines(2)
+        for key in results:
+            results[key].pop("time", None)
+            parallel[key].pop("time", None)
+        self.assertEqual(results, parallel)
+
+    def test_method_names(self):
+        self.assertEqual(bs.method_number("bfs"), '3')
+        self.assertEqual(bs.method_number("5"), '5')
+        self.assertRaises(ValueError, bs.method_number, "1")
+
+class ProofCacheTestCase(ut.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cache.db")
+        self.cache = pcache.ProofCache(self.path, max_entries=2)
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+    def assert_proves(self, args, claim, plan):
+        state = sh.initial_state(args, claim)
+        for action in plan: state = sh.apply_rule(action, state)
+        self.assertTrue(sh.proof_complete(state))
+
+    def test_lookup(self):
+        args = ["p -> q", "q -> r", "p", "t"]
+        result = rs.solve_claim(args, "r & t", '3', cache=self.cache)
+        self.assertFalse(result["cached"])
+        # Same problem with the assumptions reordered and repeated
+        reordered = ["t", "p", "t", "q -> r", "p -> q"]
+        cached = self.cache.lookup(reordered, "r & t", '3')
+        self.assertEqual(cached["status"], qs.PROVED)
+        self.assertEqual(cached["node_count"], result["node_count"])
+        self.assert_proves(reordered, "r & t", cached["plan"])
+        self.assertTrue(rs.solve_claim(reordered, "r & t", '3', cache=self.cache)["cached"])
+        self.assertIsNone(self.cache.lookup(args, "r", '3'))
+        # Results persist after the cache is closed
+        self.cache.close()
+        self.cache = pcache.ProofCache(self.path)
+        self.assert_proves(args, "r & t", self.cache.lookup(args, "r & t", '3')["plan"])
+
+    def test_methods_cached_separately(self):
+        args = ["p -> q", "q -> r", "p", "t"]
+        bfs = rs.solve_claim(args, "r & t", '3', cache=self.cache)
+        self.assertIsNone(self.cache.lookup(args, "r & t", '4'))
+        a_star = rs.solve_claim(args, "r & t", '4', cache=self.cache)
+        self.assertFalse(a_star["cached"])
+        self.assertEqual(self.cache.lookup(args, "r & t", '3')["node_count"], bfs["node_count"])
+        self.assertEqual(self.cache.lookup(args, "r & t", '4')["node_count"], a_star["node_count"])
+
+    def test_eviction(self):
+        for claim in ["q", "p & q", "q & p"]:
+            rs.solve_claim(["p -> q", "p"], claim, '3', cache=self.cache)
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNone(self.cache.lookup(["p -> q", "p"], "q", '3'))
+        self.assertIsNotNone(self.cache.lookup(["p -> q", "p"], "q & p", '3'))
+
+    def test_shared_eviction(self):
+        # Two processes sharing one cache file hold max_entries between them
+        other = pcache.ProofCache(self.path, max_entries=2)
+        try:
+            for (cache, claim) in [(self.cache, "q"), (other, "p & q"), (self.cache, "q & p"), (other, "p & p")]:
+                rs.solve_claim(["p -> q", "p"], claim, '3', cache=cache)
+            self.assertEqual((len(self.cache), len(other)), (2, 2))
+            self.assertEqual(other.stats()["size"], 2)
+        finally:
+            other.close()
+
+    def test_batch_cache(self):
+        lines = ['{"assumptions": ["p -> q", "p"], "claim": "q"}\n']
+        for cached in [False, True]:
+            output = io.StringIO()
+            bs.run_batch(lines, output, "bfs", 1, cache_path=self.path)
+            result = json.loads(output.getvalue())
+            self.assertEqual((result["status"], result["cached"]), (qs.PROVED, cached))
+
+class LemmaStoreTestCase(ut.TestCase):
+
+    args = ["p -> q", "q -> r", "r -> s", "p", "t"]
+
+    def assert_proves(self, args, claim, plan):
+        state = sh.initial_state(args, claim)
+        for action in plan: state = sh.apply_rule(action, state)
+        self.assertTrue(sh.proof_complete(state))
+
+    def test_record(self):
+        store = ls.LemmaStore()
+        problem = qs.SearchProblem(sh.initial_state(self.args, "s & t"), sh.proof_complete)
+        plan, node_count = qs.breadth_first_search(problem)
+        store.record(self.args, plan)
+        self.assertEqual(store.lemma_clauses(self.args), ["q", "r", "s", "s & t"])
+        # Only the steps a lemma depends on are kept, and the key ignores order
+        self.assertEqual(len(store.lemmas[ls.canonical_args(self.args)]["r"]), 2)
+        self.assertEqual(store.lemma_clauses(list(reversed(self.args))), ["q", "r", "s", "s & t"])
+        # A problem's own claim is never a lemma
+        self.assertEqual(store.lemma_clauses(self.args, "s & t"), ["q", "r", "s"])
+
+    def test_search(self):
+        store = ls.LemmaStore()
+        first = store.search(self.args, "s & t", qs.breadth_first_search)
+        self.assert_proves(self.args, "s & t", first.plan)
+        self.assertEqual(len(store), 0)
+        store.record(self.args, first.plan)
+        # Later problems start from the lemmas and splice their derivations back in
+        args = list(reversed(self.args))
+        for claim in ["t & s", "s", "r & t"]:
+            result = store.search(args, claim, qs.breadth_first_search)
+            plan_bfs, node_count_bfs = qs.breadth_first_search(qs.SearchProblem(sh.initial_state(args, claim), sh.proof_complete))
+            self.assertEqual(result.status, qs.PROVED)
+            self.assert_proves(args, claim, result.plan)
+            self.assertEqual(len(result.plan), len(plan_bfs))
+            self.assertLess(result.node_count, node_count_bfs)
+            store.record(args, result.plan)
+        budget = qs.SearchBudget(max_nodes=100)
+        self.assertEqual(store.search(self.args, "u", lambda p: qs.breadth_first_search(p, budget=budget)).status, qs.NODE_LIMIT)
+
+    def test_experiment_lemmas(self):
+        store = ls.LemmaStore()
+        problem = qs.SearchProblem(sh.initial_state(self.args, "s & t"), sh.proof_complete)
+        plan_astar, node_count_astar = qs.a_star_search(problem, astar.simple_heuristic)
+        for i in range(2):
+            (bfs, a_star, base, a_star_nn) = ae.AutomatedExperiments.run_experiment(
+                self.args, 0, 5, astar.simple_heuristic, claim="s & t", lemmas=store)
+            self.assertTrue(sh.proof_complete(a_star[0][-1]))
+            self.assertEqual(len(a_star[0]), len(plan_astar) + 1)
+            # The searches of a problem do not see each other's lemmas
+            if i == 0: self.assertEqual(a_star[1], node_count_astar)
+            # and never start from their own claim
+            self.assertGreater(a_star[1], 1)
+            self.assertEqual(a_star_nn[1], node_count_astar)
+        self.assertGreater(len(store), 0)
+
+class SaturationTestCase(ut.TestCase):
+
+    def solve(self, args, claim):
+        problem = qs.SearchProblem(sh.initial_state(args, claim), sh.proof_complete)
+        result = sat.saturation_search(problem)
+        state = problem.initial_state
+        for action in result.plan: state = sh.apply_rule(action, state)
+        self.assertEqual(sh.proof_complete(state), result.status == qs.PROVED)
+        return result
+
+    def test_proofs(self):
+        args = ["p -> q", "q -> r", "r -> s", "p", "t"]
+        for claim in ["s", "s & t", "q", "p -> s", "t & p"]:
+            result = self.solve(args, claim)
+            self.assertEqual(result.status, qs.PROVED)
+            plan_bfs, node_count_bfs = qs.breadth_first_search(qs.SearchProblem(sh.initial_state(args, claim), sh.proof_complete))
+            self.assertEqual(len(result.plan), len(plan_bfs))
+        self.assertEqual(self.solve(["p -> q", "~q"], "~p").status, qs.PROVED)
+        self.assertEqual(self.solve(["p | q", "~p"], "q").status, qs.PROVED)
+        self.assertEqual(self.solve(["(p -> q)", "p"], "q").status, qs.PROVED)
+        self.assertEqual(self.solve(["p", "p"], "p").plan, [])
+
+    def test_unprovable(self):
+        # BFS would not finish on this claim
+        result = self.solve(["p", "q", "r", "t", "u"], "s")
+        self.assertEqual(result.status, qs.EXHAUSTED)
+        self.assertEqual(result.node_count, 5)
+
+    def test_saturate(self):
+        (saturation, status) = sat.saturate(["p -> q", "q -> r", "p"], "r", stop_at_claim=False)
+        self.assertEqual(status, qs.PROVED)
+        self.assertTrue(saturation.provable("q"))
+        self.assertTrue(saturation.provable("p -> r"))
+        self.assertEqual(len(saturation.proof("q")), 1)
+        self.assertIsNone(saturation.proof("s"))
+        (saturation, status) = sat.saturate(["p -> q", "q -> r", "p"], "r", budget=qs.SearchBudget(max_nodes=3))
+        self.assertEqual(status, qs.NODE_LIMIT)
+
+    def test_solve_claim(self):
+        result = rs.solve_claim(["p -> q", "p"], "q", '6')
+        self.assertEqual(result["proof"][-1], (3, "q", "Modus Ponens (2, 1)"))
+
+class InstrumentationTestCase(ut.TestCase):
+
+    def problem(self):
+        return qs.SearchProblem(sh.initial_state(["p -> q", "r -> (p & q)", "r | s", "~s"], "q & r"), sh.proof_complete)
+
+    def test_profile(self):
+        profiler = ins.SearchProfiler(trace=True)
+        result = qs.a_star_search(self.problem(), astar.simple_heuristic, profiler=profiler)
+        self.assertEqual(tuple(result), tuple(qs.a_star_search(self.problem(), astar.simple_heuristic)))
+        self.assertIsNone(qs.a_star_search(self.problem(), astar.simple_heuristic).profile)
+        profile = result.profile
+        counters = profile["counters"]
+        self.assertEqual(counters["nodes_expanded"], result.node_count)
+        self.assertEqual(counters["nodes_generated"], sum(b["generated"] for b in profile["branching"].values()))
+        self.assertEqual(counters["heuristic_calls"], counters["nodes_generated"] + 1)
+        self.assertEqual(profile["branching"][0], {"expanded": 1, "generated": 1, "factor": 1.0})
+        for phase in ["search", "search;expand;rule_matching", "search;expand;apply_rule", "search;frontier_pop"]:
+            self.assertIn(phase, profile["timers"])
+        self.assertEqual(profile["timers"]["search;expand"]["calls"], result.node_count - 1)
+        # Time spent in each phase itself adds up to the whole search
+        total = sum(int(line.split()[-1]) for line in profiler.collapsed_stacks())
+        self.assertAlmostEqual(total, profile["timers"]["search"]["seconds"] * 1e6, delta=50)
+        events = profiler.chrome_trace()["traceEvents"]
+        self.assertEqual(len(events), sum(t["calls"] for t in profile["timers"].values()))
+
+    def test_batch_heuristic(self):
+        profiler = ins.SearchProfiler()
+        batch_heuristic = lambda states: [astar.simple_heuristic(state) for state in states]
+        result = qs.a_star_search(self.problem(), astar.simple_heuristic, batch_heuristic, profiler=profiler)
+        self.assertEqual(result.profile["counters"]["batch_heuristic_calls"], result.node_count - 1)
+        self.assertEqual(profiler.events, [])
+        result = qs.breadth_first_search(self.problem(), profiler=ins.SearchProfiler())
+        self.assertGreater(result.profile["counters"]["duplicates_rejected"], 0)
+
+class FrontierTestCase(ut.TestCase):
+
+    # Minimal stand-in for a SearchNode (frontiers only use key and path_risk)
+    class Node(object):
+        def __init__(self, key, path_risk):
+            self.key = key
+            self.path_risk = path_risk
+
+    def drain(self, frontier):
+        popped = []
+        while frontier.is_not_empty(): popped.append(frontier.pop())
+        return [(node.key, node.path_risk) for node in popped]
+
+    def check_order(self, frontier):
+        rng = np.random.default_rng(0)
+        expected = {}
+        for i in range(2000):
+            key = int(rng.integers(300))
+            risk = int(rng.integers(100))
+            added = frontier.push(self.Node(key, risk))
+            self.assertEqual(added, key not in expected or risk < expected[key][0])
+            if added: expected[key] = (risk, i)
+        self.assertEqual(len(frontier), len(expected))
+        order = sorted(expected.items(), key=lambda item: item[1])
+        self.assertEqual(self.drain(frontier), [(key, risk) for (key, (risk, i)) in order])
+        self.assertIsNone(frontier.pop())
+
+    def test_priority_heap(self):
+        self.check_order(qs.PriorityHeapFIFOFrontier())
+        self.check_order(qs.PriorityHeapFIFOFrontier(stale_ratio=1e9))
+
+    def test_compaction(self):
+        frontier = qs.PriorityHeapFIFOFrontier(stale_ratio=0.5)
+        for risk in range(1000, 0, -1): frontier.push(self.Node("x", risk))
+        self.assertGreater(frontier.compactions, 0)
+        self.assertLess(len(frontier.heap), 2 * qs.MIN_COMPACT_SIZE)
+        # Only stale entries left: the frontier is empty
+        frontier = qs.PriorityHeapFIFOFrontier(stale_ratio=1e9)
+        frontier.push(self.Node("x", 2))
+        frontier.push(self.Node("x", 1))
+        self.assertEqual(frontier.pop().path_risk, 1)
+        self.assertFalse(frontier.is_not_empty())
+
+    def test_indexed_heap(self):
+        for d in [2, 3, 4, 8]:
+            self.check_order(qs.IndexedHeapFrontier(d))
+        frontier = qs.IndexedHeapFrontier()
+        for risk in range(1000, 0, -1): frontier.push(self.Node("x", risk))
+        self.assertEqual(len(frontier.heap), 1)
+
+    def test_a_star(self):
+        args = ["p -> q", "r -> (p & q)", "r | s", "~s"]
+        for claim in ["q & r", "p & q", "~s & r"]:
+            results = []
+            for frontier in [qs.PriorityHeapFIFOFrontier(), qs.IndexedHeapFrontier()]:
+                problem = qs.SearchProblem(sh.initial_state(args, claim), sh.proof_complete)
+                results.append(tuple(qs.a_star_search(problem, astar.simple_heuristic, frontier=frontier)))
+            self.assertEqual(results[0], results[1])
+
+class TruthTableTestCase(ut.TestCase):
+
+    def test_entails(self):
+        self.assertTrue(tt.entails(["p -> q", "p"], "q"))
+        self.assertTrue(tt.entails(["p | q", "~p"], "q"))
+        self.assertTrue(tt.entails(["~(p & q)", "p"], "~q"))
+        self.assertTrue(tt.entails(["p -> q"], "~q -> ~p"))
+        self.assertTrue(tt.entails(["(p -> q) & r"], "r"))
+        self.assertTrue(tt.entails(["p -> (q -> s)", "s -> ~r", "p & q", "r | s"], "~r & q"))
+        self.assertFalse(tt.entails(["p -> q", "q"], "p"))
+        self.assertFalse(tt.entails(["p", "q", "r", "t", "u"], "s"))
+        self.assertFalse(tt.entails(["p"], "p & ~p"))
+
+    def test_cannot_decide(self):
+        self.assertIsNone(tt.entails(["p ->"], "q"))
+        self.assertIsNone(tt.entails([") & ("], "q"))
+        self.assertIsNone(tt.entails(["p"], ""))
+        self.assertIsNone(tt.entails(["p & q"], "abcdefghijklmnopq"))
+
+    def test_provable_claims_entailed(self):
+        rng = random.Random(0)
+        args = ["p -> q", "r -> (p & q)", "r | s", "~s"]
+        for i in range(50):
+            self.assertTrue(tt.entails(args, pc.generate_claim(args, 20, rng)))
+
+    def test_solve_claim(self):
+        result = rs.solve_claim(["p", "q", "r", "t", "u"], "s", '3')
+        self.assertEqual((result["status"], result["node_count"]), (tt.NOT_ENTAILED, 0))
+        result = rs.solve_claim(["p -> q", "q"], "p", '3', precheck=False)
+        self.assertEqual(result["status"], qs.EXHAUSTED)
+
+    # Modus Tollens used to conclude '~p & q' here, a clause that is not
+    # entailed, so the precheck rejected a claim the search proved
+    def test_compound_terms_grouped(self):
+        args = ["(p & q) -> r", "~r"]
+        problem = qs.SearchProblem(sh.initial_state(args, "~(p & q)"), sh.proof_complete)
+        plan, node_count = qs.breadth_first_search(problem)
+        self.assertEqual([sh.conclusion(action) for action in plan], ["~(p & q)"])
+        self.assertTrue(tt.entails(args, "~(p & q)"))
+        self.assertEqual(rs.solve_claim(args, "~(p & q)", '3')["status"], qs.PROVED)
+        self.assertEqual(rs.solve_claim(args, "~p & q", '3', precheck=False)["status"], qs.EXHAUSTED)
+        self.assertEqual(rs.solve_claim(args, "~p & q", '3')["status"], tt.NOT_ENTAILED)
+        self.assertIn("~(p & q)", gr.relevant_clauses(args, "~(p & q)"))
+        # Hypothetical Syllogism keeps the antecedent grouped
+        action = sh.valid_actions(sh.initial_state(["(p & q) -> r", "r -> s"], "s"))[0]
+        self.assertEqual(sh.conclusion(action), "(p & q) -> s")
+
+class DominanceTestCase(ut.TestCase):
+
+    def test_explored_bitsets(self):
+        explored = qs.ExploredBitsets()
+        explored.add(0b1011)
+        self.assertTrue(explored.dominates(0b0011))
+        self.assertFalse(explored.dominates(0b1011))
+        self.assertFalse(explored.dominates(0b0111))
+        explored.add(0b0111)
+        explored.add(0b110000)
+        self.assertEqual(len(explored), 3)
+        self.assertTrue(explored.dominates(0b0110))
+        self.assertTrue(explored.dominates(0b100000))
+        self.assertFalse(explored.dominates(0b100001))
+        self.assertFalse(explored.dominates(1 << 10))
+
+    def test_explored_bitsets_match_scan(self):
+        rng = random.Random(0)
+        explored = qs.ExploredBitsets()
+        states = []
+        for i in range(200):
+            bits = rng.getrandbits(12)
+            self.assertEqual(explored.dominates(bits), any(bits & ~s == 0 and bits != s for s in states))
+            explored.add(bits)
+            states.append(bits)
+
+    def test_dominance_search(self):
+        args = ["p -> q", "r -> (p & q)", "r | s", "~s"]
+        for claim in ["q & r", "p & q", "r & p"]:
+            problem = qs.SearchProblem(sh.initial_state(args, claim), sh.proof_complete)
+            self.assertEqual(tuple(qs.breadth_first_search(problem, dominance=True)), tuple(qs.breadth_first_search(problem)))
+            plan, node_count = qs.a_star_search(problem, astar.simple_heuristic, dominance=True)
+            state = problem.initial_state
+            for action in plan: state = sh.apply_rule(action, state)
+            self.assertTrue(sh.proof_complete(state))
+
+    def test_solve_claim(self):
+        args = ["p -> q", "r -> (p & q)", "r | s", "~s"]
+        result = rs.solve_claim(args, "q & r", '4', dominance=True)
+        self.assertEqual(result["status"], qs.PROVED)
+        self.assertLessEqual(result["node_count"], rs.solve_claim(args, "q & r", '4')["node_count"])
+        output = io.StringIO()
+        bs.run_batch(['{"assumptions": ["p -> q", "p"], "claim": "q"}\n'], output, "astar", 1, dominance=True)
+        self.assertEqual(json.loads(output.getvalue())["status"], qs.PROVED)
+
 # Note that __main__ is written based on test function implementation
 # from the following source.
 #   Title:          roomba_heuristic_test.py
@@ -321,7 +1280,11 @@ class QueueSearchTestCase(ut.TestCase):
 if __name__ == "__main__":
 
     num, errs, fails = 0, 0, 0
-    test_cases = [HelperTestCase, RuleTestCase, RuleDictTestCase, QueueSearchTestCase]
+    test_cases = [HelperTestCase, RuleTestCase, FormulaTestCase, RuleIndexTestCase, RuleDictTestCase, QueueSearchTestCase, HeuristicTestCase, EncodingTestCase, ProblemCorpusTestCase, ExperimentBatchTestCase, BenchmarkTestCase, SearchNodeTestCase, GoalRegressionTestCase,
+                  IterativeDeepeningTestCase, SearchModeTestCase, SearchBudgetTestCase,
+                  ProofServiceTestCase, BatchSolverTestCase, ProofCacheTestCase,
+                  LemmaStoreTestCase, SaturationTestCase, InstrumentationTestCase,
+                  FrontierTestCase, TruthTableTestCase, DominanceTestCase]
     
     for test_case in test_cases:
         test_suite = ut.TestLoader().loadTestsFromTestCase(test_case)
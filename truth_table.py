@@ -0,0 +1,96 @@
+import numpy as np
+import rule_helpers as rh
+
+# This file checks with a truth table whether the assumptions entail the
+# claim, so that claims which can never be proven are rejected before any
+# search. Each clause is evaluated as a NumPy bool array over all 2^k
+# assignments of its k literals; the claim is entailed if it is true in every
+# assignment where all of the assumptions are true.
+#
+# A claim that is not entailed has no valid proof. The rules in rule_dict are
+# sound on distinct clauses (sh.conclusion() groups compound terms, so Modus
+# Tollens concludes ~(p & q) rather than ~p & q), but applicable_rules() can
+# pair a clause with a repeated copy of itself, so a search may still reach
+# a clause that is not entailed; such a proof would not be valid either. The
+# converse does not hold (the rules are not complete), so an entailed claim
+# still has to be searched for.
+
+# Status given to claims rejected by the check (see run_solver.solve_claim)
+NOT_ENTAILED = "not_entailed"
+
+# Truth tables are only built for up to MAX_LITERALS distinct literals
+MAX_LITERALS = 16
+OPERATORS = set("~&|-> ()")
+
+# Evaluate clause over the assignments in values (literal -> bool array),
+# caching results in memo. Returns None if clause cannot be parsed.
+def evaluate(clause: str, values: dict, memo: dict):
+    if clause in memo: return memo[clause]
+    result = None
+    if len(clause) == 1 and clause not in OPERATORS:
+        result = values.get(clause)
+    elif clause[0:1] == "(" and rh.find_end_paren(clause, 0) == len(clause):
+        result = evaluate(clause[1:-1], values, memo)
+    elif len(clause) > 0:
+        (simp, a, b) = rh.parse_expression(clause)
+        # The parser does not reject malformed clauses, so check that the
+        # parts it found make up the whole clause
+        negate_a = simp.startswith("~")
+        negate_b = simp.endswith("~b")
+        operator = simp.strip("~ab").strip()
+        text = ("~" if negate_a else "") + a
+        if len(b) > 0: text += " " + operator + " " + ("~" if negate_b else "") + b
+        if len(a) > 0 and text == clause and operator in ("", "->", "&", "|") and (operator == "") == (len(b) == 0):
+            left = evaluate(a, values, memo)
+            right = evaluate(b, values, memo) if len(b) > 0 else None
+            if left is not None and negate_a: left = ~left
+            if right is not None and negate_b: right = ~right
+            if operator == "": result = left
+            elif left is not None and right is not None:
+                if operator == "->": result = ~left | right
+                elif operator == "&": result = left & right
+                else: result = left | right
+    memo[clause] = result
+    return result
+
+# True if every parenthesis in clause is closed (rh.find_end_paren() does not
+# stop on an unclosed one)
+def balanced(clause: str) -> bool:
+    depth = 0
+    for c in clause:
+        if c == "(": depth += 1
+        elif c == ")":
+            depth -= 1
+            if depth < 0: return False
+    return depth == 0
+
+# The literals (single characters) that appear in clauses
+def literals(clauses: list) -> list:
+    found = set()
+    for clause in clauses:
+        found.update(c for c in clause if c not in OPERATORS)
+    return sorted(found)
+
+# Bool array of shape (2^k, k) holding every assignment of k literals
+def assignments(k: int) -> np.ndarray:
+    return ((np.arange(2 ** k)[:, None] >> np.arange(k)) & 1).astype(bool)
+
+# Returns True if args entail claim, False if they do not (so the claim
+# cannot be proven) and None if it cannot be decided (a clause cannot be
+# parsed or there are more than MAX_LITERALS literals)
+def entails(args: list, claim: str):
+    clauses = list(args) + [claim]
+    if not all(balanced(clause) for clause in clauses): return None
+    names = literals(clauses)
+    if len(names) > MAX_LITERALS: return None
+    table = assignments(len(names))
+    values = {name: table[:, i] for i, name in enumerate(names)}
+    memo = {}
+    holds = np.ones(2 ** len(names), dtype=bool)
+    for arg in args:
+        value = evaluate(arg, values, memo)
+        if value is None: return None
+        holds &= value
+    value = evaluate(claim, values, memo)
+    if value is None: return None
+    return not np.any(holds & ~value)